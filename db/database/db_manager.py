@@ -4,15 +4,29 @@ It includes methods for initializing the database, inserting or updating entries
 """
 import sqlite3
 import os
+import shutil
+import sys
+from urllib.parse import urlsplit
 from utils.parse_utils import create_slug, create_search_key
+from utils.records import Entry
+from utils import search_vocabulary
 
 DB_NAME = 'romdb.db'
 DB_TEMP_NAME = 'romdb_temp.db'
 DB_OLD_NAME = 'romdb_old.db'
 
+# Version of the table layout, stored as the database `user_version` (bump when tables change)
+SCHEMA_VERSION = 3
+
 con = None
 cur = None
 
+# IDs of the link sources inserted so far, keyed by their fields
+link_source_ids = {}
+
+# IDs of the URL prefixes inserted so far, keyed by prefix
+url_prefix_ids = {}
+
 PLATFORMS = {
     'nes': {'brand': 'Nintendo', 'name': 'Nintendo Entertainment System'},
     'fds': {'brand': 'Nintendo', 'name': 'Famicom Disk System'},
@@ -75,7 +89,7 @@ REGIONS = {
 
 def init_database():
     """Initialize the database by creating tables, indexes, and populating initial data."""
-    global con, cur
+    global con, cur, link_source_ids, url_prefix_ids
 
     if os.path.exists(DB_TEMP_NAME):
         os.remove(DB_TEMP_NAME)
@@ -84,6 +98,9 @@ def init_database():
     cur = con.cursor()
 
     cur.execute('PRAGMA foreign_keys = ON;')
+    cur.execute(f'PRAGMA user_version = {SCHEMA_VERSION};')
+    link_source_ids = {}
+    url_prefix_ids = {}
 
     cur.execute('''
         CREATE TABLE platforms (
@@ -93,23 +110,25 @@ def init_database():
         )
     ''')
 
+    cur.execute('''
+        CREATE TABLE url_prefixes (
+            id INTEGER PRIMARY KEY,
+            prefix TEXT UNIQUE
+        )
+    ''')
+
     cur.execute('''
         CREATE TABLE entries (
-            slug TEXT PRIMARY KEY,
+            id INTEGER PRIMARY KEY,
+            slug TEXT UNIQUE,
             rom_id TEXT,
             search_key TEXT,
             title TEXT,
             platform TEXT,
-            boxart_url TEXT,
-            FOREIGN KEY (platform) REFERENCES platforms (id)
-        )
-    ''')
-
-    cur.execute('''
-        CREATE VIRTUAL TABLE entries_fts USING fts4(
-            search_key,
-            content='entries',
-            tokenize=unicode61
+            boxart_prefix INTEGER,
+            boxart_suffix TEXT,
+            FOREIGN KEY (platform) REFERENCES platforms (id),
+            FOREIGN KEY (boxart_prefix) REFERENCES url_prefixes (id)
         )
     ''')
 
@@ -122,26 +141,65 @@ def init_database():
 
     cur.execute('''
         CREATE TABLE regions_entries (
-            entry TEXT,
+            entry INTEGER,
             region TEXT,
-            FOREIGN KEY (entry) REFERENCES entries (slug),
+            FOREIGN KEY (entry) REFERENCES entries (id),
             FOREIGN KEY (region) REFERENCES regions (id)
         )
     ''')
 
     cur.execute('''
-        CREATE TABLE links (
-            entry TEXT,
-            name TEXT,
+        CREATE TABLE link_sources (
+            id INTEGER PRIMARY KEY,
             type TEXT,
             format TEXT,
-            url TEXT,
-            filename TEXT,
             host TEXT,
+            source_url TEXT
+        )
+    ''')
+
+    cur.execute('''
+        CREATE TABLE links (
+            entry INTEGER,
+            name TEXT,
+            url_prefix INTEGER,
+            url_suffix TEXT,
+            filename TEXT,
             size INTEGER,
-            size_str TEXT,
-            source_url TEXT,
-            FOREIGN KEY (entry) REFERENCES entries (slug)
+            source INTEGER,
+            FOREIGN KEY (entry) REFERENCES entries (id),
+            FOREIGN KEY (url_prefix) REFERENCES url_prefixes (id),
+            FOREIGN KEY (source) REFERENCES link_sources (id)
+        )
+    ''')
+
+    # Entries and links with their full URLs
+    cur.execute('''
+        CREATE VIEW entries_full AS
+        SELECT e.id, e.slug, e.rom_id, e.search_key, e.title, e.platform,
+               p.prefix || e.boxart_suffix AS boxart_url
+        FROM entries e
+        LEFT JOIN url_prefixes p ON p.id = e.boxart_prefix
+    ''')
+
+    cur.execute('''
+        CREATE VIEW links_full AS
+        SELECT l.rowid AS id, l.entry, l.name, p.prefix || l.url_suffix AS url,
+               l.filename, l.size, l.source
+        FROM links l
+        JOIN url_prefixes p ON p.id = l.url_prefix
+    ''')
+
+    cur.execute('''
+        CREATE TABLE hashes (
+            entry INTEGER,
+            link INTEGER,
+            name TEXT,
+            size INTEGER,
+            crc32 TEXT,
+            md5 TEXT,
+            sha1 TEXT,
+            FOREIGN KEY (entry) REFERENCES entries (id)
         )
     ''')
 
@@ -151,6 +209,12 @@ def init_database():
     cur.execute(
         'CREATE INDEX idx_regions_entries_region ON regions_entries (region);')
     cur.execute('CREATE INDEX idx_links_entry ON links (entry);')
+    cur.execute('CREATE INDEX idx_hashes_crc32 ON hashes (crc32);')
+    cur.execute('CREATE INDEX idx_hashes_md5 ON hashes (md5);')
+    cur.execute('CREATE INDEX idx_hashes_sha1 ON hashes (sha1);')
+
+    create_search_index()
+    create_search_vocabulary()
 
     for id, info in PLATFORMS.items():
         cur.execute('INSERT INTO platforms (id, brand, name) VALUES (?, ?, ?)',
@@ -160,16 +224,212 @@ def init_database():
         cur.execute('INSERT INTO regions (id, name) VALUES (?, ?)', (id, name))
 
 
-def insert_entry(entry: dict):
+def create_search_index():
+    """Create the FTS5 trigram index used to search entries by any of their names.
+
+    Each entry is indexed with three columns: its title, its alternate titles (the scraped
+    names of its links, like original No-Intro names or MAME short names, and the names
+    parsers found, like GameTDB names) and its ROM ID or serial. The index reads these from
+    the `entries_search_content` view and is filled by `build_search_index`.
+
+    Trigrams match any substring of 3 characters or more, including prefixes, so no
+    separate prefix indexes are needed. Results are meant to be ranked with
+    `bm25(10.0, 2.0, 5.0)` weights, so title matches come first.
+    """
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS alt_titles (
+            entry INTEGER,
+            title TEXT,
+            FOREIGN KEY (entry) REFERENCES entries (id)
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_alt_titles_entry ON alt_titles (entry);')
+
+    cur.execute('''
+        CREATE VIEW IF NOT EXISTS entries_search_content AS
+        SELECT e.id,
+               e.title,
+               (
+                   SELECT group_concat(name, char(10)) FROM (
+                       SELECT name FROM links WHERE entry = e.id
+                       UNION
+                       SELECT title FROM alt_titles WHERE entry = e.id
+                   )
+               ) AS alt_titles,
+               e.rom_id
+        FROM entries e
+    ''')
+
+    cur.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS entries_search USING fts5(
+            title,
+            alt_titles,
+            rom_id,
+            content='entries_search_content',
+            content_rowid='id',
+            tokenize='trigram'
+        )
+    ''')
+
+
+def build_search_index():
+    """Fill the search index from its content view in one pass and merge its segments."""
+    cur.execute("INSERT INTO entries_search (entries_search) VALUES ('rebuild')")
+    cur.execute("INSERT INTO entries_search (entries_search) VALUES ('optimize')")
+
+
+def create_search_vocabulary():
+    """Create the tables of title terms and of their deletion variants, used to correct typos.
+
+    Terms are counted by the number of entry titles they appear in. Each variant maps to the
+    terms it was derived from, see `search_vocabulary`. Both are filled by `build_search_vocabulary`.
+    """
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS search_terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE,
+            frequency INTEGER
+        )
+    ''')
+
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS search_term_variants (
+            variant TEXT,
+            term INTEGER,
+            PRIMARY KEY (variant, term),
+            FOREIGN KEY (term) REFERENCES search_terms (id)
+        ) WITHOUT ROWID
+    ''')
+
+
+def build_search_vocabulary():
+    """Fill the search vocabulary from the titles of all entries, replacing its previous contents."""
+    cur.execute('DELETE FROM search_term_variants')
+    cur.execute('DELETE FROM search_terms')
+
+    cur.execute('SELECT title FROM entries')
+    frequencies = search_vocabulary.get_term_frequencies(title for title, in cur.fetchall())
+
+    terms = sorted(frequencies)
+    cur.executemany('''
+        INSERT INTO search_terms (id, term, frequency)
+        VALUES (?, ?, ?)
+    ''', [(id, term, frequencies[term]) for id, term in enumerate(terms, start=1)])
+
+    cur.executemany('''
+        INSERT INTO search_term_variants (variant, term)
+        VALUES (?, ?)
+    ''', sorted(
+        (variant, id)
+        for id, term in enumerate(terms, start=1)
+        if len(term) >= search_vocabulary.MIN_TERM_LENGTH
+        for variant in search_vocabulary.get_variants(term)
+    ))
+
+
+def insert_alt_titles(entry_id, alt_titles):
+    """Insert the alternate titles of an entry that it does not have yet."""
+    cur.executemany('''
+        INSERT INTO alt_titles (entry, title)
+        SELECT ?1, ?2
+        WHERE NOT EXISTS (SELECT 1 FROM alt_titles WHERE entry = ?1 AND title = ?2)
+    ''', [(entry_id, title) for title in alt_titles])
+
+
+def insert_hashes(entry_id, roms, link_rowid):
+    """Insert the ROM checksums of an entry, linked to the entry and the link they describe."""
+    for name, size, crc32, md5, sha1 in roms:
+        cur.execute('''
+            INSERT INTO hashes (entry, link, name, size, crc32, md5, sha1)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (entry_id, link_rowid, name, size, crc32, md5, sha1))
+
+
+def get_url_prefix(url, listing_url=None):
+    """Get the prefix a URL is stored under.
+
+    Links below their listing URL share it as prefix. Other links, like NoPayStation PKGs that
+    sit in one directory per title, share the scheme and host of their URL instead. Box art
+    URLs have no listing and are split after their last slash, as each system and region keeps
+    its box art in one directory.
+    """
+    if listing_url:
+        if url.startswith(listing_url):
+            return listing_url
+        parts = urlsplit(url)
+        if parts.scheme and parts.netloc:
+            return f'{parts.scheme}://{parts.netloc}/'
+        return ''
+    return url[:url.rfind('/') + 1]
+
+
+def split_url(url, listing_url=None):
+    """Split a URL into the ID of its prefix, inserted on first use, and its suffix.
+
+    Returns:
+        A tuple of the prefix ID and the suffix, or (None, None) if there is no URL
+    """
+    if url is None:
+        return None, None
+
+    prefix = get_url_prefix(url, listing_url)
+    prefix_id = url_prefix_ids.get(prefix)
+    if prefix_id is None:
+        cur.execute('INSERT INTO url_prefixes (prefix) VALUES (?)', (prefix,))
+        prefix_id = url_prefix_ids[prefix] = cur.lastrowid
+    return prefix_id, url[len(prefix):]
+
+
+def get_link_source_id(link_source):
+    """Get the ID of a link source, inserting it on first use."""
+    key = (link_source.type, link_source.format, link_source.host, link_source.source_url)
+    link_source_id = link_source_ids.get(key)
+    if link_source_id is None:
+        cur.execute('''
+            INSERT INTO link_sources (type, format, host, source_url)
+            VALUES (?, ?, ?, ?)
+        ''', key)
+        link_source_id = link_source_ids[key] = cur.lastrowid
+    return link_source_id
+
+
+def insert_links(entry_id, links):
+    """Insert the links of an entry.
+
+    Returns:
+        The rowid of the last inserted link, or None if there were no links
+    """
+    link_rowid = None
+    for link in links:
+        cur.execute('''
+            INSERT INTO links (entry, name, url_prefix, url_suffix, filename, size, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            entry_id,
+            link.name,
+            *split_url(link.url, link.source_url),
+            link.filename,
+            link.size,
+            get_link_source_id(link.source)
+        ))
+        link_rowid = cur.lastrowid
+    return link_rowid
+
+
+def insert_entry(entry: Entry):
     """Insert a new entry into the database or update it if it exists."""
-    entry['slug'] = create_slug(entry)
-    entry['search_key'] = create_search_key(entry['title'])
+    entry.slug = create_slug(entry)
+    entry.search_key = create_search_key(entry.title)
+
+    boxart_prefix, boxart_suffix = split_url(entry.boxart_url)
 
     # Check if an entry with the same slug exists
-    cur.execute("SELECT slug FROM entries WHERE slug = ?", (entry['slug'],))
+    cur.execute("SELECT id FROM entries WHERE slug = ?", (entry.slug,))
     existing_entry = cur.fetchone()
 
     if existing_entry:
+        entry_id = existing_entry[0]
+
         # Update fields where they are NULL
         cur.execute('''
             UPDATE entries
@@ -177,78 +437,182 @@ def insert_entry(entry: dict):
                 search_key = COALESCE(search_key, ?),
                 title = COALESCE(title, ?),
                 platform = COALESCE(platform, ?),
-                boxart_url = COALESCE(boxart_url, ?)
-            WHERE slug = ?
+                boxart_suffix = CASE WHEN boxart_prefix IS NULL THEN ? ELSE boxart_suffix END,
+                boxart_prefix = COALESCE(boxart_prefix, ?)
+            WHERE id = ?
         ''', (
-            entry.get('rom_id'),
-            entry.get('search_key'),
-            entry.get('title'),
-            entry.get('platform'),
-            entry.get('boxart_url'),
-            entry['slug']
+            entry.rom_id,
+            entry.search_key,
+            entry.title,
+            entry.platform,
+            boxart_suffix,
+            boxart_prefix,
+            entry_id
         ))
-
-        # Add new links
-        for link in entry.get('links', []):
-            cur.execute('''
-                INSERT OR IGNORE INTO links (entry, name, type, format, url, filename, host, size, size_str, source_url)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                entry.get('slug'),
-                link.get('name'),
-                link.get('type'),
-                link.get('format'),
-                link.get('url'),
-                link.get('filename'),
-                link.get('host'),
-                link.get('size'),
-                link.get('size_str'),
-                link.get('source_url')
-            ))
     else:
         # Insert the new entry into the entries table
         cur.execute('''
-            INSERT INTO entries (slug, rom_id, search_key, title, platform, boxart_url)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO entries (slug, rom_id, search_key, title, platform, boxart_prefix, boxart_suffix)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (
-            entry.get('slug'),
-            entry.get('rom_id'),
-            entry.get('search_key'),
-            entry.get('title'),
-            entry.get('platform'),
-            entry.get('boxart_url')
+            entry.slug,
+            entry.rom_id,
+            entry.search_key,
+            entry.title,
+            entry.platform,
+            boxart_prefix,
+            boxart_suffix
         ))
-
-        # Insert into the FTS4 table
-        cur.execute('''
-            INSERT INTO entries_fts (docid, search_key)
-            VALUES (last_insert_rowid(), ?)
-        ''', (entry['search_key'],))
+        entry_id = cur.lastrowid
 
         # Insert regions into the regions_entries table
-        for region in entry.get('regions', []):
+        for region in entry.regions:
             cur.execute('''
                 INSERT OR IGNORE INTO regions_entries (entry, region)
                 VALUES (?, ?)
-            ''', (entry.get('slug'), region))
+            ''', (entry_id, region))
 
-        # Insert links into the links table
-        for link in entry.get('links', []):
-            cur.execute('''
-                INSERT INTO links (entry, name, type, format, url, filename, host, size, size_str, source_url)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                entry.get('slug'),
-                link.get('name'),
-                link.get('type'),
-                link.get('format'),
-                link.get('url'),
-                link.get('filename'),
-                link.get('host'),
-                link.get('size'),
-                link.get('size_str'),
-                link.get('source_url')
-            ))
+    # Insert the links, then the ROM checksums of the entry
+    link_rowid = insert_links(entry_id, entry.links)
+    insert_hashes(entry_id, entry.roms, link_rowid)
+    insert_alt_titles(entry_id, entry.alt_titles)
+
+
+def open_database():
+    """Open a copy of the existing database, to update it instead of building a new one."""
+    global con, cur, link_source_ids, url_prefix_ids
+
+    if os.path.exists(DB_TEMP_NAME):
+        os.remove(DB_TEMP_NAME)
+    shutil.copyfile(DB_NAME, DB_TEMP_NAME)
+
+    con = sqlite3.connect(DB_TEMP_NAME)
+    cur = con.cursor()
+
+    cur.execute('PRAGMA foreign_keys = ON;')
+
+    schema_version = cur.execute('PRAGMA user_version;').fetchone()[0]
+    if schema_version != SCHEMA_VERSION:
+        print(f"Database schema version {schema_version} is not supported "
+              f"(expected {SCHEMA_VERSION}), build a new database instead.")
+        sys.exit(1)
+
+    cur.execute('SELECT id, type, format, host, source_url FROM link_sources')
+    link_source_ids = {tuple(key): id for id, *key in cur.fetchall()}
+    cur.execute('SELECT id, prefix FROM url_prefixes')
+    url_prefix_ids = {prefix: id for id, prefix in cur.fetchall()}
+
+    # The search index is rebuilt when closing, so older layouts of it can be replaced
+    cur.execute('DROP TABLE IF EXISTS entries_search')
+    create_search_index()
+    create_search_vocabulary()
+
+
+def get_stored_entries():
+    """Get the stored entries as a dict mapping each slug to its (platform, rom_id, title, boxart_url)."""
+    cur.execute('SELECT slug, platform, rom_id, title, boxart_url FROM entries_full')
+    return {slug: tuple(values) for slug, *values in cur.fetchall()}
+
+
+def get_stored_links():
+    """Get the stored links in insertion order, as (rowid, entry slug, name, source_url) tuples."""
+    cur.execute('''
+        SELECT l.rowid, e.slug, l.name, s.source_url
+        FROM links l
+        JOIN entries e ON e.id = l.entry
+        JOIN link_sources s ON s.id = l.source
+        ORDER BY l.rowid
+    ''')
+    return cur.fetchall()
+
+
+def get_stored_hashes():
+    """Get the stored ROM checksums as a dict mapping each entry slug to their rowids and values."""
+    hashes = {}
+    cur.execute('''
+        SELECT h.rowid, e.slug, h.link, h.name, h.size, h.crc32, h.md5, h.sha1
+        FROM hashes h
+        JOIN entries e ON e.id = h.entry
+        ORDER BY h.rowid
+    ''')
+    for rowid, entry, *values in cur.fetchall():
+        rowids, entry_hashes = hashes.setdefault(entry, ([], []))
+        rowids.append(rowid)
+        entry_hashes.append(tuple(values))
+    return hashes
+
+
+def get_stored_regions():
+    """Get the stored regions as a dict mapping each entry slug to a list of region codes."""
+    regions = {}
+    cur.execute('''
+        SELECT e.slug, r.region
+        FROM regions_entries r
+        JOIN entries e ON e.id = r.entry
+        ORDER BY r.rowid
+    ''')
+    for entry, region in cur.fetchall():
+        regions.setdefault(entry, []).append(region)
+    return regions
+
+
+def get_stored_alt_titles():
+    """Get the stored alternate titles as a dict mapping each entry slug to a list of titles."""
+    alt_titles = {}
+    cur.execute('''
+        SELECT e.slug, a.title
+        FROM alt_titles a
+        JOIN entries e ON e.id = a.entry
+        ORDER BY a.rowid
+    ''')
+    for entry, title in cur.fetchall():
+        alt_titles.setdefault(entry, []).append(title)
+    return alt_titles
+
+
+def get_entry_id(slug):
+    """Get the ID of a stored entry by its slug."""
+    cur.execute('SELECT id FROM entries WHERE slug = ?', (slug,))
+    return cur.fetchone()[0]
+
+
+def replace_alt_titles(slug, alt_titles):
+    """Replace the stored alternate titles of an entry."""
+    entry_id = get_entry_id(slug)
+    cur.execute('DELETE FROM alt_titles WHERE entry = ?', (entry_id,))
+    cur.executemany('''
+        INSERT INTO alt_titles (entry, title)
+        VALUES (?, ?)
+    ''', [(entry_id, title) for title in alt_titles])
+
+
+def update_entry(slug, rom_id, title, boxart_url):
+    """Update the enriched fields of a stored entry, keeping its search key in sync."""
+    cur.execute('''
+        UPDATE entries
+        SET rom_id = ?,
+            search_key = ?,
+            title = ?,
+            boxart_prefix = ?,
+            boxart_suffix = ?
+        WHERE slug = ?
+    ''', (rom_id, create_search_key(title), title, *split_url(boxart_url), slug))
+
+
+def replace_hashes(slug, rowids, hashes):
+    """Replace the stored ROM checksums of an entry.
+
+    Args:
+        slug: The slug of the entry
+        rowids: The rowids of the checksums currently stored for the entry
+        hashes: The new checksums, as (link rowid, name, size, crc32, md5, sha1) tuples
+    """
+    entry_id = get_entry_id(slug)
+    cur.executemany('DELETE FROM hashes WHERE rowid = ?', [(rowid,) for rowid in rowids])
+    cur.executemany('''
+        INSERT INTO hashes (entry, link, name, size, crc32, md5, sha1)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(entry_id, *values) for values in hashes])
 
 
 def close_database():
@@ -6,25 +6,9 @@ It integrates various scrapers and parsers to handle data from multiple platform
 import json
 import sys
 import os
-from parsers import no_intro
-from scrapers import myrient, internet_archive, nopaystation, mariocube
-from parsers import libretro, gametdb, mame, wii_rom_set_by_ghostware
 from database import db_manager
-
-SCRAPERS = {
-    'myrient': myrient,
-    'internet_archive': internet_archive,
-    'nopaystation': nopaystation,
-    'mariocube': mariocube
-}
-
-PARSERS = {
-    'no_intro': no_intro,
-    'libretro': libretro,
-    'gametdb': gametdb,
-    'mame': mame,
-    'wii_rom_set_by_ghostware': wii_rom_set_by_ghostware
-}
+from utils import delta_cache, parser_pool, registry, static_store
+from utils.external_sort import EntrySorter
 
 
 def load_sources(file_path='sources.json'):
@@ -34,17 +18,58 @@ def load_sources(file_path='sources.json'):
 
 
 def get_scraper(name):
-    """Retrieve a scraper by its name."""
-    return SCRAPERS.get(name)
+    """Retrieve a scraper by its name, importing it on first use."""
+    return registry.get_plugin('scrapers', name)
 
 
 def get_parser(name):
-    """Retrieve a parser by its name."""
-    return PARSERS.get(name)
+    """Retrieve a parser by its name, importing it on first use."""
+    return registry.get_plugin('parsers', name)
+
 
+def get_data_signature(source, platform):
+    """Collect the reference data signatures of all parsers used by a source."""
+    signature = {}
+    for parser_name in source['parsers']:
+        parser = get_parser(parser_name)
+        if parser and hasattr(parser, 'get_data_signature'):
+            signature[parser_name] = parser.get_data_signature(platform)
+    return signature
 
-def process_sources(sources, use_cached, scraper_filter=None):
-    """Process the sources to scrape, parse, and insert data into the database."""
+
+def get_parser_configs(sources, scraper_filter=None):
+    """Collect the (platform, flags) configurations of each parser used by the selected sources."""
+    configs = {}
+    for platform, source_list in sources.items():
+        for source in source_list:
+            if scraper_filter and source['scraper'] not in scraper_filter:
+                continue
+            for parser_name, parser_flags in source['parsers'].items():
+                configs.setdefault(parser_name, []).append((platform, parser_flags))
+    return configs
+
+
+def prepare_parsers(configs):
+    """Let parsers load or prefetch the reference data needed by the selected sources up front."""
+    for parser_name, parser_configs in configs.items():
+        parser = get_parser(parser_name)
+        if parser and hasattr(parser, 'prepare'):
+            parser.prepare(parser_configs)
+
+
+def print_delta_report(report):
+    """Print the added, removed and changed row counts of each source URL."""
+    for url, counts in report.items():
+        short_url = url.rstrip('/').split('/')[-1][:50]
+        print(f"      {short_url}... +{counts['added']} -{counts['removed']} "
+              f"~{counts['changed']} ({counts['unchanged']} unchanged)")
+
+
+def process_sources(sources, use_cached, scraper_filter=None, full=False, sorter=None):
+    """Process the sources to scrape, parse, and insert data into the database.
+
+    If a sorter is given, entries are collected into it instead of being inserted right away.
+    """
     for platform, source_list in sources.items():
         # Filter sources by scraper if specified
         if scraper_filter:
@@ -68,28 +93,175 @@ def process_sources(sources, use_cached, scraper_filter=None):
 
             entries = scraper.scrape(source, platform, use_cached)
 
-            for parser_name, parser_flags in source['parsers'].items():
-                parser = get_parser(parser_name)
-                if not parser:
+            # Only rows added or changed since the previous run go through the parsers
+            snapshot_path = delta_cache.get_snapshot_path(
+                source, platform, get_data_signature(source, platform))
+            snapshot = {} if full else delta_cache.load_snapshot(snapshot_path)
+            rows = delta_cache.group_rows(entries)
+            changed_entries, report = delta_cache.diff_rows(rows, snapshot)
+            if snapshot:
+                print_delta_report(report)
+
+            for parser_name in source['parsers']:
+                if not get_parser(parser_name):
                     print(f"Parser '{parser_name}' not found.")
                     sys.exit(1)
 
-                entries = parser.parse(entries, parser_flags)
+            changed_entries = parser_pool.parse_entries(
+                changed_entries, list(source['parsers'].items()))
+
+            entries, snapshot = delta_cache.merge_rows(rows, snapshot)
+            delta_cache.save_snapshot(snapshot_path, snapshot)
 
             for entry in entries:
-                db_manager.insert_entry(entry)
+                if sorter:
+                    sorter.add(entry)
+                else:
+                    db_manager.insert_entry(entry)
+
+
+def reenrich_sources(sources):
+    """Rerun the parsers over the links stored in the database and update the entries that changed.
+
+    Each link is rebuilt into the entry its scraper created, then goes through the parsers of its
+    source again. Like when building, the first link of an entry sets its title and the first
+    non-empty ROM ID and box art URL win. Slugs are kept, so links and regions stay untouched.
+    """
+    # Find the source of each stored link by its platform and listing URL
+    listing_sources = {}
+    for platform, source_list in sources.items():
+        for source in source_list:
+            for url in source['urls']:
+                listing_sources.setdefault((platform, url), source)
 
+    stored_entries = db_manager.get_stored_entries()
+    stored_regions = db_manager.get_stored_regions()
+    stored_hashes = db_manager.get_stored_hashes()
+    stored_alt_titles = db_manager.get_stored_alt_titles()
 
-def make(use_cached=False, sources_file='sources.json', scraper_filter=None):
-    """Main function to initialize the database, process sources, and close the database."""
+    # Rebuild the scraped entries, grouped by source so each group shares its parser chain
+    source_links = {}
+    skipped_slugs = set()
+    for rowid, slug, name, source_url in db_manager.get_stored_links():
+        platform, rom_id = stored_entries[slug][:2]
+        source = listing_sources.get((platform, source_url))
+        if not source:
+            # Entries with links from sources that no longer exist cannot be rebuilt
+            skipped_slugs.add(slug)
+            continue
+
+        scraper = get_scraper(source['scraper'])
+        entry = scraper.SCRAPER.rebuild_entry(
+            name, source, platform, rom_id, list(stored_regions.get(slug, ())))
+        source_links.setdefault(id(source), (source, []))[1].append((rowid, slug, entry))
+
+    # Rerun the parser chains
+    parsed_links = []
+    for source, links in source_links.values():
+        entries = [entry for _, _, entry in links]
+        parser_pool.parse_entries(entries, list(source['parsers'].items()))
+        parsed_links.extend(links)
+
+    # Combine the parsed links of each entry in insertion order
+    parsed_links.sort(key=lambda link: link[0])
+    values = {}
+    for rowid, slug, entry in parsed_links:
+        if slug in skipped_slugs:
+            continue
+        if slug not in values:
+            values[slug] = [entry.rom_id, entry.title, entry.boxart_url, [], []]
+        else:
+            entry_values = values[slug]
+            if entry_values[0] is None:
+                entry_values[0] = entry.rom_id
+            if entry_values[2] is None:
+                entry_values[2] = entry.boxart_url
+        values[slug][3].extend((rowid, *rom) for rom in entry.roms)
+        values[slug][4].extend(t for t in entry.alt_titles if t not in values[slug][4])
+
+    # Update the entries whose enriched fields changed
+    counts = {'rom_id': 0, 'title': 0, 'boxart_url': 0, 'hashes': 0, 'alt_titles': 0}
+    for slug, (rom_id, title, boxart_url, hashes, alt_titles) in values.items():
+        _, stored_rom_id, stored_title, stored_boxart_url = stored_entries[slug]
+        changes = {
+            'rom_id': rom_id != stored_rom_id,
+            'title': title != stored_title,
+            'boxart_url': boxart_url != stored_boxart_url
+        }
+        if any(changes.values()):
+            db_manager.update_entry(slug, rom_id, title, boxart_url)
+
+        rowids, stored_entry_hashes = stored_hashes.get(slug, ([], []))
+        changes['hashes'] = hashes != stored_entry_hashes
+        if changes['hashes']:
+            db_manager.replace_hashes(slug, rowids, hashes)
+
+        changes['alt_titles'] = alt_titles != stored_alt_titles.get(slug, [])
+        if changes['alt_titles']:
+            db_manager.replace_alt_titles(slug, alt_titles)
+
+        for field, changed in changes.items():
+            counts[field] += changed
+
+    print(f"\nRe-enriched {len(values)} entries ({len(skipped_slugs)} skipped): "
+          f"{counts['rom_id']} ROM IDs, {counts['title']} titles, "
+          f"{counts['boxart_url']} box art URLs, {counts['hashes']} checksum sets and "
+          f"{counts['alt_titles']} alternate title sets changed.")
+
+
+def reenrich(sources_file='sources.json', jobs=1):
+    """Apply the current reference data to the existing database without scraping."""
     sources = load_sources(sources_file)
+    db_manager.open_database()
+
+    parser_configs = get_parser_configs(sources)
+    prepare_parsers(parser_configs)
+
+    parser_pool.start(jobs)
+    try:
+        reenrich_sources(sources)
+    finally:
+        parser_pool.shutdown()
+
+    db_manager.build_search_index()
+    db_manager.build_search_vocabulary()
+    db_manager.close_database()
+    print("Database re-enriched successfully.")
+
+
+def make(use_cached=False, sources_file='sources.json', scraper_filter=None, pack_static=False,
+         full=False, jobs=1, memory_budget=None):
+    """Main function to initialize the database, process sources, and close the database.
+
+    With a memory budget in bytes, entries are spilled to sorted runs on disk while sources are
+    processed, then merged by slug and inserted once all sources are done.
+    """
+    sources = load_sources(sources_file)
+    static_store.PACK_ENABLED = pack_static
     db_manager.init_database()
 
     if scraper_filter:
         print(f"Filtering to scrapers: {', '.join(scraper_filter)}")
 
-    process_sources(sources, use_cached, scraper_filter)
+    parser_configs = get_parser_configs(sources, scraper_filter)
+    prepare_parsers(parser_configs)
+
+    # Workers are started after the parsers are prepared, so forked workers inherit their data
+    sorter = EntrySorter(memory_budget) if memory_budget else None
+    parser_pool.start(jobs)
+    try:
+        process_sources(sources, use_cached, scraper_filter, full, sorter)
+    finally:
+        parser_pool.shutdown()
+
+    if sorter:
+        print(f"\nInserting {sorter.sequence} entries merged by slug...")
+        for entry in sorter.merge():
+            db_manager.insert_entry(entry)
 
+    # The trigram index is filled once all entries are in, rather than row by row
+    db_manager.build_search_index()
+    db_manager.build_search_vocabulary()
     db_manager.close_database()
     print("Database created successfully.")
 
@@ -100,15 +272,32 @@ if __name__ == '__main__':
 
     args = sys.argv[1:] if len(sys.argv) > 1 else []
     use_cached = '--use-cached' in args
+    # Also pack generated static files (RAP/ZRIF) into one SQLite file per directory
+    pack_static = '--pack-static' in args
+    # Re-parse every row instead of reusing unchanged rows from the previous run
+    full = '--full' in args
+    # Rerun the parsers over the existing database with the current reference data, without scraping
+    reenrich_only = '--reenrich' in args
 
     # Check for --sources argument
     sources_file = 'sources.json'
     scraper_filter = None
+    jobs = 1
+    memory_budget = None
     for i, arg in enumerate(args):
         if arg == '--sources' and i + 1 < len(args):
             sources_file = args[i + 1]
         elif arg == '--scrapers' and i + 1 < len(args):
             # Comma-separated list of scrapers to run
             scraper_filter = [s.strip() for s in args[i + 1].split(',')]
+        elif arg == '--jobs' and i + 1 < len(args):
+            # Number of worker processes used to parse entries (0 for one per CPU core)
+            jobs = int(args[i + 1]) or os.cpu_count()
+        elif arg == '--memory-budget' and i + 1 < len(args):
+            # Resident memory in MB above which collected entries are spilled to disk
+            memory_budget = int(args[i + 1]) * 1024 * 1024
 
-    make(use_cached, sources_file, scraper_filter)
+    if reenrich_only:
+        reenrich(sources_file, jobs)
+    else:
+        make(use_cached, sources_file, scraper_filter, pack_static, full, jobs, memory_budget)
@@ -4,7 +4,10 @@ retrieving box art URLs, and enriching game entries with additional metadata.
 """
 import re
 import xml.etree.ElementTree as ET
+from functools import lru_cache
+from utils import cache_manager
 from utils.parse_utils import create_search_key
+from utils.parser_pool import is_worker
 
 # List of XML filenames containing game data
 XML_FILENAMES = [
@@ -218,33 +221,216 @@ BOXART_URL_PLATFORM_PATHS_MAP = {
 # Base URL for GameTDB artwork
 GAMETDB_ARTWORK_BASE_URL = 'https://art.gametdb.com'
 
-# Global variable to store parsed TDB data
-tdbs = None
+# Directory containing the downloaded TDB XML files
+TDBS_DIR = 'data/gametdb'
 
-def load_tdbs():
-    """Load TDB data from XML files into memory."""
-    global tdbs
-    tdbs = {}
+# Version of the compiled TDB format (bump when `TdbGame` or `parse_tdb` change)
+COMPILED_TDB_VERSION = 1
 
-    for xml_filename in XML_FILENAMES:
-        try:
-            tree = ET.parse(f'data/gametdb/{xml_filename}')
-            root = tree.getroot()
+# Precompiled patterns for capturing region codes and GameTDB IDs
+ID_REGION_CODE_REGEXES = {
+    xml_filename: re.compile(pattern) for xml_filename, pattern in ID_REGION_CODE_PATTERN_MAP.items()}
+SERIAL_GAMETDB_ID_REGEXES = {
+    platform: re.compile(pattern) for platform, pattern in SERIAL_GAMETDB_ID_PATTERN_MAP.items()}
 
-            tdbs[xml_filename] = []
+# Parsed TDB data, keyed by XML filename and loaded on first use
+tdbs = {}
 
-            for game in root.findall('game'):
-                tdbs[xml_filename].append(
-                    {
-                        'name': game.get('name'),
-                        'id': game.find('id').text,
-                        'type': game.find('type').text,
-                        'region': game.find('region').text
-                    }
-                )
-        except FileNotFoundError:
-            print(f"Warning: {xml_filename} not found, skipping GameTDB enrichment for related platforms...")
-            tdbs[xml_filename] = []
+# ID lookup indexes (exact ID to game, ID prefix to first matching ID), keyed by XML filename
+tdb_indexes = {}
+
+# Length of the n-grams used to index normalized game names
+TITLE_NGRAM_LENGTH = 3
+
+# Pattern for removing the parenthesized suffix of a title before comparing it
+TITLE_SUFFIX_PATTERN = re.compile(r"\(.*")
+
+# Title matching indexes, keyed by XML filename
+title_indexes = {}
+
+
+class TdbGame:
+    """Compact record of a game listed in a TDB XML file."""
+
+    __slots__ = ('name', 'id', 'type', 'region')
+
+    def __init__(self, name, id, type, region):
+        self.name = name
+        self.id = id
+        self.type = type
+        self.region = region
+
+    def __getstate__(self):
+        return (self.name, self.id, self.type, self.region)
+
+    def __setstate__(self, state):
+        self.name, self.id, self.type, self.region = state
+
+
+def get_child_text(element, tag):
+    """Get the text of a child element, or None if it does not exist."""
+    child = element.find(tag)
+    return child.text if child is not None else None
+
+
+def parse_tdb(filepath):
+    """Stream a TDB XML file into a list of games, clearing elements as they are read."""
+    games = []
+    depth = 0
+    root = None
+
+    for event, element in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        # Only games directly under the root element are listed
+        if depth == 1 and element.tag == 'game':
+            games.append(TdbGame(
+                element.get('name'),
+                get_child_text(element, 'id'),
+                get_child_text(element, 'type'),
+                get_child_text(element, 'region')
+            ))
+        if depth == 1:
+            # Drop the finished element and its children to keep memory flat
+            root.clear()
+
+    return games
+
+
+def get_tdb(xml_filename):
+    """Get the games of a TDB XML file, loading its compiled form (or parsing it) on first use."""
+    if xml_filename not in tdbs:
+        filepath = f'{TDBS_DIR}/{xml_filename}'
+        signature = (COMPILED_TDB_VERSION, cache_manager.get_file_signature([filepath]))
+        index_name = f'gametdb-{xml_filename}'
+
+        games = cache_manager.get_compiled_index(index_name, signature)
+        if games is None:
+            try:
+                games = parse_tdb(filepath)
+            except FileNotFoundError:
+                print(f"Warning: {xml_filename} not found, skipping GameTDB enrichment for related platforms...")
+                games = []
+            else:
+                cache_manager.cache_compiled_index(index_name, signature, games)
+
+        tdbs[xml_filename] = games
+    return tdbs[xml_filename]
+
+
+def get_tdb_index(xml_filename):
+    """Get the ID lookup indexes of a TDB XML file, building them on first use.
+
+    Returns:
+        A dict mapping each ID to its first game, and a dict mapping every ID prefix
+        to the first ID (in file order) that starts with it
+    """
+    if xml_filename not in tdb_indexes:
+        games_by_id = {}
+        ids_by_prefix = {}
+        for game in get_tdb(xml_filename):
+            if game.id is None:
+                continue
+            games_by_id.setdefault(game.id, game)
+            for length in range(len(game.id) + 1):
+                ids_by_prefix.setdefault(game.id[:length], game.id)
+
+        tdb_indexes[xml_filename] = (games_by_id, ids_by_prefix)
+    return tdb_indexes[xml_filename]
+
+
+def get_title_compare_value(title):
+    """Get the normalized value used to compare an entry title with game names."""
+    return create_search_key(TITLE_SUFFIX_PATTERN.sub('', title))
+
+
+def get_ngrams(value):
+    """Get the distinct n-grams of a normalized value."""
+    return {value[i:i + TITLE_NGRAM_LENGTH] for i in range(len(value) - TITLE_NGRAM_LENGTH + 1)}
+
+
+def get_title_index(xml_filename):
+    """Get the title matching index of a TDB XML file, building it on first use.
+
+    Game names are normalized once and bucketed by (platform, region). Each bucket
+    lists its game positions and maps every n-gram of the names to the positions
+    of the games containing it, both in file order.
+
+    Returns:
+        The normalized names (by game position) and the buckets
+    """
+    if xml_filename not in title_indexes:
+        compare_values = []
+        buckets = {}
+        type_platform_map = TYPE_PLATFORM_MAP[xml_filename]
+
+        for position, game in enumerate(get_tdb(xml_filename)):
+            compare_value = get_title_compare_value(game.name)
+            compare_values.append(compare_value)
+
+            # Games of unknown type match every platform
+            bucket_key = (type_platform_map.get(game.type), REGION_REGION_MAP.get(game.region))
+            positions, ngrams = buckets.setdefault(bucket_key, ([], {}))
+            positions.append(position)
+            for ngram in get_ngrams(compare_value):
+                ngrams.setdefault(ngram, []).append(position)
+
+        title_indexes[xml_filename] = (compare_values, buckets)
+    return title_indexes[xml_filename]
+
+
+def find_best_match(title, platform, regions, xml_filename):
+    """Find the game whose name contains the entry title and is shortest.
+
+    Only games of the entry platform (or of an unknown type) and of one of the entry
+    regions (if any) are considered. Ties keep the first game in file order.
+    """
+    tdb = get_tdb(xml_filename)
+    compare_values, buckets = get_title_index(xml_filename)
+    title_compare_value = get_title_compare_value(title)
+    title_ngrams = get_ngrams(title_compare_value)
+
+    candidates = []
+    for (game_platform, game_region), (positions, ngrams) in buckets.items():
+        if game_platform not in (platform, None):
+            continue
+        if regions and game_region not in regions:
+            continue
+
+        if title_ngrams:
+            # Every candidate contains all n-grams of the title, so the rarest one is enough
+            rarest = min((ngrams.get(ngram, ()) for ngram in title_ngrams), key=len)
+            positions = [position for position in rarest
+                         if title_compare_value in compare_values[position]]
+        elif title_compare_value:
+            positions = [position for position in positions
+                         if title_compare_value in compare_values[position]]
+        candidates.extend(positions)
+
+    best_match = None
+    best_match_name = None
+    for position in sorted(candidates):
+        game = tdb[position]
+        # Keep the comparison of the original matcher (normalized length against raw name length)
+        if not best_match_name or len(compare_values[position]) < len(best_match_name):
+            best_match = game
+            best_match_name = game.name
+
+    return best_match
+
+
+@lru_cache(maxsize=None)
+def get_region_country(xml_filename, region_code):
+    """Get the artwork country of a region code (first matching pattern wins)."""
+    for pattern, country in REGION_CODE_COUNTRY_MAP[xml_filename].items():
+        if re.match(pattern, region_code):
+            return country
+    return None
 
 
 def build_boxart_url(platform, country, id):
@@ -259,20 +445,15 @@ def build_boxart_url(platform, country, id):
 
 def find_full_id(id, platform):
     """Retrieve the first game ID that contains a the given ID as a substring"""
-    xml_filename = PLATFORM_XML_MAP[platform]
-    for game in tdbs[xml_filename]:
-        if game['id'].startswith(id):
-            return game['id']
-    return None
+    _, ids_by_prefix = get_tdb_index(PLATFORM_XML_MAP[platform])
+    return ids_by_prefix.get(id)
 
 
 def get_boxart_url_by_id(id, platform):
     """Retrieve the boxart URL for a game by its ID and platform."""
     xml_filename = PLATFORM_XML_MAP[platform]
-    region_code_pattern = ID_REGION_CODE_PATTERN_MAP[xml_filename]
-    valid_id_pattern = SERIAL_GAMETDB_ID_PATTERN_MAP[platform]
 
-    match = re.search(valid_id_pattern, id)
+    match = SERIAL_GAMETDB_ID_REGEXES[platform].search(id)
     if not match:
         return None
     valid_id = ''.join(match.groups())
@@ -280,97 +461,87 @@ def get_boxart_url_by_id(id, platform):
     if not full_valid_id:
         return None
 
-    match = re.match(region_code_pattern, full_valid_id)
+    match = ID_REGION_CODE_REGEXES[xml_filename].match(full_valid_id)
     if not match:
         return None
     region_code = match.group(1)
 
-    boxart_url = None
-    for pattern, country in REGION_CODE_COUNTRY_MAP[xml_filename].items():
-        if not re.match(pattern, region_code):
-            continue
+    country = get_region_country(xml_filename, region_code)
+    if not country:
+        return None
+    return build_boxart_url(platform, country, full_valid_id)
+
+
+def get_data_signature(platform):
+    """Get a signature of the TDB XML file used to enrich entries of a platform."""
+    xml_filename = PLATFORM_XML_MAP.get(platform)
+    return cache_manager.get_file_signature([f'data/gametdb/{xml_filename}'])
+
+
+def prepare(configs):
+    """Load the TDB XML files and build the indexes of all platforms processed in this run."""
+    for xml_filename in {PLATFORM_XML_MAP[platform] for platform, _ in configs
+                         if platform in PLATFORM_XML_MAP}:
+        get_tdb_index(xml_filename)
+        get_title_index(xml_filename)
+
 
-        boxart_url = build_boxart_url(platform, country, full_valid_id)
-        break
-    return boxart_url
+def add_alt_title(entry, name):
+    """Keep a GameTDB name of an entry as an alternate title, unless it is the title already."""
+    if name and name != entry.title and name not in entry.alt_titles:
+        entry.alt_titles += (name,)
 
 
 def parse(entries, flags):
     """Parse game entries and enrich them with additional data."""
-    if not tdbs:
-        load_tdbs()
-
     parse_boxart = flags.get('parse_boxart', True)
     parse_name = flags.get('parse_name', False)
 
     total = len(entries)
     progress_interval = max(1, total // 10)  # Report every 10%
 
+    # Pool workers parse chunks of a source, the main process reports their progress instead
+    report_progress = not is_worker()
+
     for i, entry in enumerate(entries):
         # Print progress every 10%
-        if i > 0 and i % progress_interval == 0:
+        if report_progress and i > 0 and i % progress_interval == 0:
             percent = (i * 100) // total
             print(f"      Enriching entries... {percent}% ({i}/{total})")
-        xml_filename = PLATFORM_XML_MAP[entry['platform']]
+        xml_filename = PLATFORM_XML_MAP[entry.platform]
 
         # If a rom ID is set already, parse the box art URL or name directly
-        if entry.get('rom_id'):
+        if entry.rom_id:
             if parse_boxart:
-                entry['boxart_url'] = get_boxart_url_by_id(
-                    entry['rom_id'], entry['platform'])
-            if parse_name:
-                for game in tdbs[xml_filename]:
-                    if game['id'] != entry['rom_id']:
-                        continue
-
-                    entry['title'] = game['name']
-                    break
+                entry.boxart_url = get_boxart_url_by_id(
+                    entry.rom_id, entry.platform)
+            games_by_id, _ = get_tdb_index(xml_filename)
+            game = games_by_id.get(entry.rom_id)
+            if game:
+                if parse_name:
+                    # The replaced title stays searchable
+                    add_alt_title(entry, entry.title)
+                    entry.title = game.name
+                else:
+                    add_alt_title(entry, game.name)
 
             continue
 
         # We do not have a rom ID, use the logic to find the best matching game in TDB
-
-        # Get a simple to compare value from the entry title
-        title_compare_value = create_search_key(
-            re.sub(r"\(.*", '', entry['title']))
-
-        regions = entry['regions']
-        platform = entry['platform']
-
-        best_match = None
-        best_match_name = None
-
-        for game in tdbs[xml_filename]:
-            # Skip if platform does not match
-            if platform != TYPE_PLATFORM_MAP[xml_filename].get(game['type'], platform):
-                continue
-
-            # Skip if game region does not match any of the entry regions
-            game_region = REGION_REGION_MAP.get(game['region'])
-            if regions and game_region not in regions:
-                continue
-
-            # Get a simple to compare value from the game name
-            name_compare_value = create_search_key(
-                re.sub(r"\(.*", '', game['name']))
-
-            # Skip if entry title is not a substring of game name
-            if title_compare_value not in name_compare_value:
-                continue
-
-            # Update best match
-            if not best_match_name or len(name_compare_value) < len(best_match_name):
-                best_match = game
-                best_match_name = game['name']
+        platform = entry.platform
+        best_match = find_best_match(entry.title, platform, entry.regions, xml_filename)
 
         if best_match:
             if parse_boxart:
-                entry['boxart_url'] = get_boxart_url_by_id(
-                    best_match['id'], platform)
+                entry.boxart_url = get_boxart_url_by_id(
+                    best_match.id, platform)
             if parse_name:
-                entry['title'] = best_match['name']
+                add_alt_title(entry, entry.title)
+                entry.title = best_match.name
+            else:
+                add_alt_title(entry, best_match.name)
 
-    if total > 0:
+    if report_progress and total > 0:
         print(f"      Enriching entries... done ({total} entries)")
 
     return entries
@@ -4,10 +4,12 @@ from libretro DAT files. It includes platform-specific configurations,
 functions to load and parse DAT files, and methods to enhance game entries 
 with ROM IDs and box art URLs.
 """
-import requests
+import hashlib
 import re
 from urllib.parse import quote, unquote
+from utils import cache_manager, git_mirror
 from utils.parse_utils import remove_ext
+from utils.scrape_utils import fetch_urls
 
 # Platform-specific metadata definitions
 PLATFORMS = {
@@ -312,84 +314,231 @@ PLATFORMS = {
     }
 }
 
-# Global variable to store parsed DATs
-dbs = None
-
-
-def load_dbs():
-    """Load and parse the libretro DAT files for each platform."""
-    global dbs
-    dbs = {}
-
-    for platform, data in PLATFORMS.items():
-        dbs[platform] = {}
-
-        for dat_filename in data['dats']:
-            # Open and read the .dat file
-            with open(f'data/libretro/{dat_filename}', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            game = None
-            in_rom_section = False
-            for line in lines:
-                line = line.strip()
-                if line.startswith('game ('):
-                    # Start of a new game entry
-                    game = {}
-                    in_rom_section = False
-                elif line.startswith('rom ('):
-                    # Start of a ROM section
-                    in_rom_section = True
-                    if line.endswith(')'):
-                        # End of ROM section
-                        in_rom_section = False
-                elif line == ')':
-                    # End of a game entry
-                    if in_rom_section:
-                        in_rom_section = False
-                    elif game is not None:
-                        # Save game data if both name and serial are present
-                        if 'name' in game and 'serial' in game:
-                            # Do not overwrite if present
-                            if not game['name'] in dbs[platform]:
-                                dbs[platform][game['name']] = game['serial']
-                        game = None
-                elif not in_rom_section:
-                    # Parse game name and serial
-                    if line.startswith('name') and game is not None:
-                        game['name'] = line.split('"', 1)[1].rsplit('"', 1)[0]
-                    elif line.startswith('serial') and game is not None:
-                        game['serial'] = line.split(
-                            '"', 1)[1].rsplit('"', 1)[0]
+# Base URL of the libretro thumbnails server
+THUMBNAILS_BASE_URL = 'https://thumbnails.libretro.com'
 
+# Pattern for capturing box art links in a thumbnail index
+THUMBNAIL_LINK_PATTERN = re.compile(r"<tr>.*alt=\"\[IMG\]\".*?href=\"(.*?)\".*?>.*?</tr>")
 
-def parse(entries, flags):
-    """Parse a list of entries and enrich them with ROM IDs and box art URLs."""
-    if not dbs:
-        load_dbs()
+# Directory containing the downloaded libretro DAT files
+DATS_DIR = 'data/libretro'
 
-    for entry in entries:
-        # Retrieve the database for the platform
-        db = dbs.get(entry['platform'])
-        entry['rom_id'] = db.get(entry['title'])
+# Version of the compiled DAT index format (bump when `parse_dat` output changes)
+COMPILED_DAT_VERSION = 2
+
+# Pattern for capturing the key/value pairs of a ROM section (values may be quoted)
+ROM_FIELD_PATTERN = re.compile(r'(\w+)\s+(?:"([^"]*)"|(\S+))')
+
+# Checksum fields captured from ROM sections
+ROM_HASH_FIELDS = ('crc', 'md5', 'sha1')
+
+# Parsed DATs as (game name to serial, game name to ROMs), keyed by platform and loaded on first use
+dbs = {}
+
+# Sets of available box art names, keyed by libretro system (shared by platforms of the same system)
+thumbnail_indexes = {}
+
+# Git blob IDs of the downloaded DAT files by path, loaded on first use (empty if not recorded)
+blob_ids = None
+
+
+def get_quoted_value(line):
+    """Extract the quoted value of a DAT line (e.g. `name "Game (USA)"`)."""
+    return line.split('"', 1)[1].rsplit('"', 1)[0]
+
+
+def parse_rom(section):
+    """Parse the fields of a ROM section into a (name, size, crc32, md5, sha1) tuple."""
+    fields = {}
+    for key, quoted_value, value in ROM_FIELD_PATTERN.findall(section):
+        if key not in fields:
+            fields[key] = quoted_value or value
+
+    size = fields.get('size')
+    hashes = (fields[field].lower() if field in fields else None for field in ROM_HASH_FIELDS)
+    return (fields.get('name'), int(size) if size and size.isdigit() else None, *hashes)
+
+
+def parse_dat(filepath):
+    """Parse a libretro DAT file line by line.
+
+    Returns:
+        A mapping of game names to serials, and a mapping of game names to their ROMs
+        as (name, size, crc32, md5, sha1) tuples
+    """
+    serials = {}
+    roms = {}
+
+    name = serial = None
+    game_roms = []
+    rom_lines = None
+    in_game = False
+    with open(filepath, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            first_char = line[0]
+            if first_char == 'g' and line.startswith('game ('):
+                # Start of a new game entry
+                in_game = True
+                rom_lines = None
+                name = serial = None
+                game_roms = []
+            elif first_char == 'r' and line.startswith('rom ('):
+                if line.endswith(')'):
+                    # Single-line ROM section
+                    game_roms.append(parse_rom(line[5:-1]))
+                else:
+                    # Start of a multi-line ROM section
+                    rom_lines = [line[5:]]
+            elif line == ')':
+                # End of a ROM section or of a game entry
+                if rom_lines is not None:
+                    game_roms.append(parse_rom(' '.join(rom_lines)))
+                    rom_lines = None
+                elif in_game:
+                    if name is not None:
+                        # Save game data if both name and serial are present (do not overwrite)
+                        if serial is not None and name not in serials:
+                            serials[name] = serial
+                        if game_roms and name not in roms:
+                            roms[name] = tuple(game_roms)
+                    in_game = False
+            elif rom_lines is not None:
+                rom_lines.append(line)
+            elif in_game:
+                # Parse game name and serial
+                if first_char == 'n' and line.startswith('name'):
+                    name = get_quoted_value(line)
+                elif first_char == 's' and line.startswith('serial'):
+                    serial = get_quoted_value(line)
+
+    return serials, roms
+
+
+def get_dat_signature(dat_filename):
+    """Get a signature of a DAT file, preferring its recorded git blob ID over file stats."""
+    global blob_ids
+
+    if blob_ids is None:
+        manifest = git_mirror.load_manifest(DATS_DIR)
+        blob_ids = manifest['files'] if manifest else {}
+
+    blob_id = blob_ids.get(dat_filename)
+    if blob_id:
+        return (dat_filename, blob_id)
+    return cache_manager.get_file_signature([f'{DATS_DIR}/{dat_filename}'])
+
+
+def load_dat(dat_filename):
+    """Load a DAT file from its compiled index, parsing and compiling it if outdated."""
+    filepath = f'{DATS_DIR}/{dat_filename}'
+    signature = (COMPILED_DAT_VERSION, get_dat_signature(dat_filename))
+    index_name = f'libretro-{dat_filename}'
 
-        # Construct the URL for box art thumbnails
-        index_url = f"https://thumbnails.libretro.com/{quote(PLATFORMS[entry['platform']]['system'])}/Named_Boxarts/"
+    dat = cache_manager.get_compiled_index(index_name, signature)
+    if dat is None:
+        dat = parse_dat(filepath)
+        cache_manager.cache_compiled_index(index_name, signature, dat)
 
-        # If box art list is not cached, fetch it from the server
-        if not 'available_boxarts' in PLATFORMS[entry['platform']]:
-            PLATFORMS[entry['platform']]['available_boxarts'] = []
-            r = requests.get(index_url)
+    return dat
 
-            # Extract box art filenames from the HTML response
-            results = re.findall(
-                r"<tr>.*alt=\"\[IMG\]\".*?href=\"(.*?)\".*?>.*?</tr>", r.text)
-            for result in results:
-                PLATFORMS[entry['platform']]['available_boxarts'].append(
-                    remove_ext(unquote(result)))
+
+def get_db(platform):
+    """Get the game name to serial and game name to ROMs mappings of a platform.
+
+    The platform's DATs are loaded on first use.
+    """
+    if platform not in dbs:
+        serials = {}
+        roms = {}
+        for dat_filename in PLATFORMS[platform]['dats']:
+            try:
+                dat_serials, dat_roms = load_dat(dat_filename)
+            except FileNotFoundError:
+                print(f"Warning: {dat_filename} not found, skipping libretro enrichment from it...")
+                continue
+
+            # Earlier DATs take precedence over later ones
+            for name, serial in dat_serials.items():
+                serials.setdefault(name, serial)
+            for name, game_roms in dat_roms.items():
+                roms.setdefault(name, game_roms)
+
+        dbs[platform] = (serials, roms)
+    return dbs[platform]
+
+
+def get_thumbnail_index_digest(platform):
+    """Get a digest of the box art names available for a platform."""
+    names = sorted(get_thumbnail_index(platform))
+    return hashlib.sha1('\n'.join(names).encode('utf-8')).hexdigest()
+
+
+def get_data_signature(platform):
+    """Get a signature of the DAT files and the box art index used to enrich entries of a platform."""
+    if platform not in PLATFORMS:
+        return []
+    dats = PLATFORMS[platform]['dats']
+    return [get_dat_signature(dat) for dat in dats] + [get_thumbnail_index_digest(platform)]
+
+
+def get_thumbnail_index_url(system):
+    """Get the URL of the box art index of a libretro system."""
+    return f"{THUMBNAILS_BASE_URL}/{quote(system)}/Named_Boxarts/"
+
+
+def parse_thumbnail_index(response):
+    """Extract the set of available box art names from a thumbnail index response."""
+    return frozenset(remove_ext(unquote(link))
+                     for link in THUMBNAIL_LINK_PATTERN.findall(response))
+
+
+def prefetch_thumbnail_indexes(platforms):
+    """Fetch the box art indexes of the given platforms' systems concurrently, through the cache."""
+    systems = {PLATFORMS[platform]['system'] for platform in platforms if platform in PLATFORMS}
+    urls = {get_thumbnail_index_url(system): system
+            for system in systems if system not in thumbnail_indexes}
+    if not urls:
+        return
+
+    responses = fetch_urls(urls, use_cached=True)
+    for url, system in urls.items():
+        thumbnail_indexes[system] = parse_thumbnail_index(responses.get(url) or '')
+
+
+def get_thumbnail_index(platform):
+    """Get the set of available box art names for a platform."""
+    system = PLATFORMS[platform]['system']
+    if system not in thumbnail_indexes:
+        prefetch_thumbnail_indexes([platform])
+    return thumbnail_indexes[system]
+
+
+def prepare(configs):
+    """Load the DAT files and prefetch the box art indexes of all platforms processed in this run."""
+    platforms = {platform for platform, _ in configs if platform in PLATFORMS}
+    for platform in sorted(platforms):
+        get_db(platform)
+    prefetch_thumbnail_indexes(platforms)
+
+
+def parse(entries, flags):
+    """Parse a list of entries and enrich them with ROM IDs, ROM checksums and box art URLs."""
+    for entry in entries:
+        platform = entry.platform
+
+        # Retrieve the database for the platform
+        serials, roms = get_db(platform)
+        entry.rom_id = serials.get(entry.title)
+        if entry.title in roms:
+            entry.roms = roms[entry.title]
 
         # Add box art URL if available
-        if entry['title'] in PLATFORMS[entry['platform']]['available_boxarts']:
-            entry['boxart_url'] = f"{index_url}{quote(entry['title'])}.png"
+        if entry.title in get_thumbnail_index(platform):
+            index_url = get_thumbnail_index_url(PLATFORMS[platform]['system'])
+            entry.boxart_url = f"{index_url}{quote(entry.title)}.png"
 
     return entries
@@ -4,44 +4,100 @@ extracted from XML files in the MAME software directory.
 """
 import os
 import xml.etree.ElementTree as ET
+from utils import cache_manager, git_mirror
+
+# Directory the MAME hash directory is downloaded to, along with its revision manifest
+DATA_DIR = 'data/mame'
 
 # Directory containing XML files with MAME software data
-XMLS_DIR = 'data/mame/hash'
+XMLS_DIR = f'{DATA_DIR}/hash'
+
+# Version of the compiled ROM index format (bump when `parse_software_list` changes)
+COMPILED_ROMS_VERSION = 1
 
 # Global dictionary to store ROMs data
 roms = None
 
 
+def get_blob_ids():
+    """Get the git blob IDs of the downloaded hash files by path, or None if they were not recorded."""
+    manifest = git_mirror.load_manifest(DATA_DIR)
+    return manifest['files'] if manifest else None
+
+
+def get_software_list_filenames():
+    """List the software list XML files to load, in a stable order."""
+    if not os.path.isdir(XMLS_DIR):
+        return []
+
+    return sorted(f for f in os.listdir(XMLS_DIR) if f.endswith('.xml'))
+
+
+def get_hash_signature(filenames):
+    """Get a signature of the hash files, preferring their recorded git blob IDs over file stats."""
+    blob_ids = get_blob_ids()
+    if blob_ids:
+        return [(f, blob_ids.get(f'hash/{f}')) for f in filenames]
+    return cache_manager.get_file_signature([os.path.join(XMLS_DIR, f) for f in filenames])
+
+
+def parse_software_list(filepath, descriptions):
+    """Stream a software list XML file, adding the description of each software by name."""
+    depth = 0
+    root = None
+
+    for event, element in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            if element.tag == 'software':
+                description = element.find('description')
+                descriptions[element.get('name')] = description.text if description is not None else None
+            # Drop the finished element and its children to keep memory flat
+            root.clear()
+
+
 def load_roms():
-    """Load ROM data from XML files in the specified directory."""
+    """Load ROM descriptions from the compiled index, or from the software lists."""
     global roms
-    roms = {}
 
-    for filename in os.listdir(XMLS_DIR):
-        if not filename.endswith('.xml'):
-            continue
+    filenames = get_software_list_filenames()
+    signature = (COMPILED_ROMS_VERSION, get_hash_signature(filenames))
+
+    roms = cache_manager.get_compiled_index('mame', signature)
+    if roms is None:
+        roms = {}
+        for filename in filenames:
+            parse_software_list(os.path.join(XMLS_DIR, filename), roms)
+        cache_manager.cache_compiled_index('mame', signature, roms)
 
-        filepath = os.path.join(XMLS_DIR, filename)
 
-        tree = ET.parse(filepath)
-        root = tree.getroot()
+def get_data_signature(platform):
+    """Get a signature of the MAME hash files used to rename entries."""
+    return get_hash_signature(get_software_list_filenames())
 
-        for software in root.findall('software'):
-            name = software.get('name')
-            description = software.find('description').text
-            roms[name] = description
+
+def prepare(configs):
+    """Load the software lists once for all sources processed in this run."""
+    if roms is None:
+        load_roms()
 
 
 def parse(entries, flags):
     """Parse a list of entries and update their titles based on ROM data."""
-    if not roms:
+    if roms is None:
         load_roms()
 
     for entry in entries:
         # Check if the entry's title matches a ROM name
-        if entry['title'] in roms:
-            entry['rom_id'] = entry['title']
+        if entry.title in roms:
+            entry.rom_id = entry.title
             # Update the title with the ROM description
-            entry['title'] = roms[entry['title']]
+            entry.title = roms[entry.title]
 
     return entries
@@ -4,7 +4,7 @@ primarily following the No-Intro naming convention. It includes functions
 to extract regions, clean up titles, and normalize their structure.
 """
 import re
-from utils.parse_utils import normalize_repeated_chars
+from functools import lru_cache
 
 # Mapping of regions to their respective database region
 REGIONS_MAP = {
@@ -71,26 +71,87 @@ WORD_ARTICLES = [
 ]
 
 
-def parse_regions(title):
-    """Parse the regions from a title."""
-    # Extract all groups of parentheses from the title
-    matches = re.findall(r"\((.*?)\)", title)
+# Set of contents that are in parentheses to remove from titles, for fast lookups
+TITLE_REMOVE_SET = frozenset(TITLE_REMOVE_LIST)
+
+# Maximum number of memoized titles and parentheses groups
+TITLE_CACHE_SIZE = 1 << 16
+
+# Pattern matching the parentheses groups of a title
+GROUP_PATTERN = re.compile(r"\((.*?)\)")
+
+# Pattern matching the title structure: main name, article, and optional extra info
+ARTICLE_PATTERN = re.compile(r"^(.*?),\s*(\S+)(?:\s+(.*))?$")
+
+# Pattern matching repeated spaces, as normalized by `normalize_repeated_chars`
+SPACES_PATTERN = re.compile(' +')
+
+# Characters that have a special meaning in the patterns built by `remove_groups_with_contents`
+PATTERN_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
 
-    # Split the contents of each parentheses group into subgroups
-    groups = [group.split(',') for group in matches]
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def parse_group(group):
+    """Parse the contents of a parentheses group.
 
+    Returns:
+        A tuple of the regions named in the group, whether the group is removed from
+        clean titles, and whether its contents can be matched literally
+    """
     regions = []
-    for group in groups:
-        for content in group:
-            content = content.strip()
-            region = REGIONS_MAP.get(content)
-            if region and region not in regions:
-                regions.append(region)
-        # Stop processing further groups if regions are found
-        if regions:
-            break
+    removable = True
+    literal = True
+    for content in group.split(','):
+        if PATTERN_SPECIAL_CHARS.intersection(content):
+            literal = False
+        content = content.strip()
+        region = REGIONS_MAP.get(content)
+        if region and region not in regions:
+            regions.append(region)
+        if content not in TITLE_REMOVE_SET:
+            removable = False
+
+    return tuple(regions), removable, literal
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def parse_title(title):
+    """Parse a title into its base name and parentheses groups in a single pass.
+
+    Returns:
+        A tuple of the regions of the first group that names any, and the clean title
+    """
+    # Alternating text segments and group contents, starting with the base name
+    parts = GROUP_PATTERN.split(title)
+    groups = parts[1::2]
+    parsed_groups = [parse_group(group) for group in groups]
+
+    regions = next((regions for regions, _, _ in parsed_groups if regions), ())
+
+    if not any(removable for _, removable, _ in parsed_groups):
+        clean_title = title
+    elif (all(literal for _, removable, literal in parsed_groups if removable)
+          and not any('(' in group for group in groups)):
+        # Every removable group only matches itself, so drop them while rebuilding the title
+        for i, (group, (_, removable, _)) in enumerate(zip(groups, parsed_groups)):
+            parts[2 * i + 1] = '' if removable else f'({group})'
+        clean_title = ''.join(parts)
+    else:
+        # Nested parentheses or pattern characters: remove groups by pattern, as they may overlap
+        clean_title = title
+        for group, (_, removable, _) in zip(groups, parsed_groups):
+            if removable:
+                clean_title = remove_groups_with_contents(clean_title, group.split(','))
+
+    # Normalize repeated spaces
+    clean_title = SPACES_PATTERN.sub(' ', clean_title).strip()
+
+    return regions, clean_title
 
-    return regions
+
+def parse_regions(title):
+    """Parse the regions from a title."""
+    return list(parse_title(title)[0])
 
 
 def remove_groups_with_contents(title, contents_to_remove):
@@ -105,8 +166,7 @@ def remove_groups_with_contents(title, contents_to_remove):
 
 def move_article(title):
     """Move the article in a title to the beginning."""
-    # Match the title structure: main name, article, and optional extra info
-    match = re.match(r"^(.*?),\s*(\S+)(?:\s+(.*))?$", title)
+    match = ARTICLE_PATTERN.match(title)
 
     if match:
         name = match.group(1)
@@ -133,45 +193,20 @@ def move_article(title):
 
 def get_clean_title(title):
     """Clean the title by removing unnecessary groups and normalizing it."""
-    clean_title = title
-
-    # Extract all groups of parentheses from the title
-    matches = re.findall(r"\((.*?)\)", title)
-
-    # Split the contents of each parentheses group into subgroups
-    groups = [group.split(',') for group in matches]
-
-    # Remove parentheses groups if they match specific criteria
-    for group in groups:
-        remove_group = True
-        for content in group:
-            content = content.strip()
-            if content not in REGIONS_MAP and content not in LANGUAGES and content not in TITLE_REMOVE_LIST:
-                remove_group = False
-                break
-            if content in REGIONS_MAP and content not in TITLE_REMOVE_LIST:
-                remove_group = False
-                break
-        if remove_group:
-            clean_title = remove_groups_with_contents(clean_title, group)
-
-    # Normalize repeated spaces and move articles
-    clean_title = normalize_repeated_chars(clean_title, ' ')
-
-    return clean_title
+    return parse_title(title)[1]
 
 
 def process_entry(entry, parse_title_regions, clean_title_contents, move_title_article):
     """Process a single entry by applying various transformations."""
     if parse_title_regions:
-        if not entry.get('regions'):
-            entry['regions'] = parse_regions(entry['title'])
+        if not entry.regions:
+            entry.regions = parse_regions(entry.title)
 
     if clean_title_contents:
-        entry['title'] = get_clean_title(entry['title'])
+        entry.title = get_clean_title(entry.title)
 
     if move_title_article:
-        entry['title'] = move_article(entry['title'])
+        entry.title = move_article(entry.title)
 
 
 def parse(entries, flags):
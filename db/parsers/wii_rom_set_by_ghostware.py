@@ -25,8 +25,8 @@ def get_clean_title(name):
 
 def process_entry(entry):
     """Process a single entry by extracting the ROM ID and cleaning the title."""
-    entry['rom_id'] = parse_id(entry['title'])
-    entry['title'] = get_clean_title(entry['title'])
+    entry.rom_id = parse_id(entry.title)
+    entry.title = get_clean_title(entry.title)
 
 
 def parse(entries, flags):
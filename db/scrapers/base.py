@@ -0,0 +1,120 @@
+"""
+This module provides the base class shared by all scrapers.
+A scraper fetches the listings of a source, extracts entries from each of them and yields the
+entries asynchronously. Scrapers declare their capabilities, so the shared fetching logic (and
+any scheduler) can pick the fastest safe strategy for each host.
+"""
+import asyncio
+import html
+
+from utils import cache_manager
+from utils.scrape_utils import fetch_url_async
+from utils.parse_utils import size_str_to_bytes, join_urls
+from utils.records import Entry, Link, get_link_source
+
+
+class Scraper:
+    """Base class for scrapers of directory-style listings."""
+
+    # Host name stored with every link
+    host_name = None
+
+    # Listings of a source can be fetched concurrently and yielded as soon as they are processed
+    supports_streaming = False
+
+    # Listings can only be fetched with a real browser (Playwright)
+    needs_browser = False
+
+    # Some listings can only be read with a logged-in session
+    needs_auth = False
+
+    # The host honours If-None-Match/If-Modified-Since, so stale cached listings are revalidated
+    supports_conditional_get = False
+
+    def __init__(self):
+        self.session = None
+
+    def create_session(self):
+        """Create the session used to fetch listings, or None to use the default one."""
+        return None
+
+    def get_session(self):
+        """Get the session used to fetch listings, creating it on first use."""
+        if self.session is None:
+            self.session = self.create_session()
+        return self.session
+
+    async def fetch_listing(self, url, use_cached, session=None):
+        """Fetch the listing at a URL, optionally using a cached version."""
+        url_stripped = url.rstrip('/')
+        short_url = url_stripped.split('/')[-1][:50] if '/' in url_stripped else url_stripped[:50]
+
+        if use_cached:
+            response = cache_manager.get_cached_response(url)
+            if response:
+                age = cache_manager.get_cache_age_days(url)
+                age_str = f" ({age:.0f}d old)" if age else ""
+                print(f"      {short_url}... cached{age_str}")
+                return response
+
+        return await fetch_url_async(
+            url, session or self.get_session(), self.supports_conditional_get)
+
+    def extract_entries(self, response, source, platform, base_url):
+        """Extract entries from a listing response."""
+        raise NotImplementedError
+
+    def create_entry(self, link, filename, title, size_str, source, platform, base_url):
+        """Create an entry representing a single listing row."""
+        name = html.unescape(title)
+        size = size_str_to_bytes(size_str)
+        url = join_urls(base_url, link)
+        link_source = get_link_source(source['type'], source['format'], self.host_name, base_url)
+
+        return Entry(
+            name, platform, source['regions'],
+            [Link(name, url, filename, size, link_source)],
+            row=(base_url, filename, size)
+        )
+
+    def rebuild_entry(self, name, source, platform, rom_id, regions):
+        """Rebuild an entry as scraped, before parsing, from its stored link name, ROM ID and regions.
+
+        Used to rerun the parsers over an existing database without scraping again.
+        """
+        return Entry(name, platform, source['regions'], [])
+
+    async def process_listing(self, response, url, source, platform, use_cached):
+        """Turn a fetched listing into entries."""
+        return self.extract_entries(response, source, platform, url)
+
+    async def iter_entries(self, source, platform, use_cached=False):
+        """Yield the entries of all listings of a source, in listing order."""
+        urls = source['urls']
+
+        # Start all fetches at once when the host allows it, otherwise fetch one by one
+        if self.supports_streaming and not self.needs_browser:
+            fetches = [asyncio.ensure_future(self.fetch_listing(url, use_cached)) for url in urls]
+        else:
+            fetches = [None] * len(urls)
+
+        for url, fetch in zip(urls, fetches):
+            response = await (fetch or self.fetch_listing(url, use_cached))
+            if not response:
+                print(f"Warning: Failed to get response from {url}, skipping...")
+                continue
+
+            entries = await self.process_listing(response, url, source, platform, use_cached)
+            if not entries:
+                print(f"Warning: No entries parsed from {url}, skipping...")
+                continue
+
+            for entry in entries:
+                yield entry
+
+    def scrape(self, source, platform, use_cached=False):
+        """Scrape all entries of a source."""
+        async def collect():
+            return [entry async for entry in self.iter_entries(source, platform, use_cached)]
+
+        return asyncio.run(collect())
@@ -3,14 +3,11 @@ This module provides functionality to scrape and parse entries from MarioCube in
 It detects the plain-text directory listings returned to curl-style clients, extracts file
 metadata, and formats the data into structured entries ready for downstream processing.
 """
-import html
 import re
-import sys
 import urllib.parse
 
-from utils import cache_manager
-from utils.scrape_utils import fetch_url, create_scraper_session
-from utils.parse_utils import size_str_to_bytes, join_urls
+from scrapers.base import Scraper
+from utils.scrape_utils import create_scraper_session
 
 HOST_NAME = 'MarioCube'
 
@@ -20,54 +17,14 @@ CURL_HEADERS = {
     'Accept': '*/*'
 }
 
-
-def extract_entries(response, source, platform, base_url):
-    """Extract entries from the ANSI-colored directory listing response."""
-    entries = []
-
-    for filename, size_str in parse_listing_lines(response):
-        match = re.match(source['filter'], filename)
-        if not match:
-            continue
-
-        title = match.group(1)
-        encoded_link = urllib.parse.quote(filename)
-        entries.append(create_entry(
-            encoded_link, filename, title, size_str, source, platform, base_url))
-
-    return entries
-
-
-def create_entry(link, filename, title, size_str, source, platform, base_url):
-    """Create a dictionary representing a single entry."""
-    name = html.unescape(title)
-    size = size_str_to_bytes(size_str)
-    url = join_urls(base_url, link)
-
-    return {
-        'title': name,
-        'platform': platform,
-        'regions': source['regions'],
-        'links': [
-            {
-                'name': name,
-                'type': source['type'],
-                'format': source['format'],
-                'url': url,
-                'filename': filename,
-                'host': HOST_NAME,
-                'size': size,
-                'size_str': size_str,
-                'source_url': base_url
-            }
-        ]
-    }
+# Pattern for ANSI escape sequences used to color the listing
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
 
 
 def parse_listing_lines(response):
     """Yield filename and size pairs from the raw listing response."""
     for raw_line in response.splitlines():
-        line = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]').sub('', raw_line).strip()
+        line = ANSI_ESCAPE_PATTERN.sub('', raw_line).strip()
         if not line or line.startswith('#'):
             continue
 
@@ -79,39 +36,32 @@ def parse_listing_lines(response):
         yield filename, size_str
 
 
-def fetch_response(url, use_cached, session=None):
-    """Fetch the response from a URL, optionally using a cached version."""
-    url_stripped = url.rstrip('/')
-    short_url = url_stripped.split('/')[-1][:50] if '/' in url_stripped else url_stripped[:50]
+class MarioCubeScraper(Scraper):
+    """Scraper for MarioCube plain-text directory listings."""
 
-    if use_cached:
-        response = cache_manager.get_cached_response(url)
-        if response:
-            print(f"      {short_url}... cached")
-            return response
+    host_name = HOST_NAME
+    supports_streaming = True
 
-    # Fetch the URL directly if no cached response is available
-    return fetch_url(url, session=session)
+    def create_session(self):
+        """Create a session with curl-like headers to get plain-text listings."""
+        return create_scraper_session(CURL_HEADERS)
 
+    def extract_entries(self, response, source, platform, base_url):
+        """Extract entries from the ANSI-colored directory listing response."""
+        entries = []
 
-def scrape(source, platform, use_cached=False):
-    """Scrape entries from MarioCube based on the source configuration."""
-    entries = []
-    session = create_scraper_session(CURL_HEADERS)
+        for filename, size_str in parse_listing_lines(response):
+            match = re.match(source['filter'], filename)
+            if not match:
+                continue
 
-    for url in source['urls']:
-        # Fetch the response for each URL
-        response = fetch_response(url, use_cached, session=session)
-        if not response:
-            print(f"Warning: Failed to get response from {url}, skipping...")
-            continue
+            title = match.group(1)
+            encoded_link = urllib.parse.quote(filename)
+            entries.append(self.create_entry(
+                encoded_link, filename, title, size_str, source, platform, base_url))
 
-        # Extract entries from the response
-        parsed_entries = extract_entries(response, source, platform, url)
-        if not parsed_entries:
-            print(f"Warning: No entries parsed from {url}, skipping...")
-            continue
+        return entries
 
-        entries.extend(parsed_entries)
 
-    return entries
+SCRAPER = MarioCubeScraper()
+scrape = SCRAPER.scrape
@@ -3,15 +3,15 @@ This module provides functionality to scrape and process data from the NoPayStat
 It includes methods for handling PS3 RAP files, PSV ZRIF strings, and parsing links and entries
 from the source data. The module also supports caching and fetching responses from URLs.
 """
-import os
-import requests
+import asyncio
 import csv
 import io
 import xml.etree.ElementTree as ET
-import sys
-from utils import cache_manager
-from utils.scrape_utils import fetch_url
-from utils.parse_utils import size_bytes_to_str, join_urls
+from scrapers.base import Scraper
+from utils import static_store
+from utils.scrape_utils import fetch_urls
+from utils.parse_utils import join_urls
+from utils.records import Entry, Link, get_link_source
 
 HOST_NAME = 'NoPayStation'
 
@@ -32,16 +32,14 @@ PSV_ZRIFS_DIR = 'static/content/psv/zrifs'
 PSV_ZRIFS_BASE_URL = f'{MAIN_SITE}/static/content/psv/zrifs'
 
 
-def create_rap_file(rap, filepath):
-    """Create a RAP file from a hex string."""
-    with open(filepath, 'wb') as f:
-        f.write(bytes.fromhex(rap))
+def create_rap_file(rap, filename):
+    """Create a RAP file from a hex string, skipping the write if unchanged."""
+    static_store.write_file(PS3_RAPS_DIR, filename, bytes.fromhex(rap))
 
 
-def create_zrif_file(zrif, filepath):
-    """Create a ZRIF file from a string."""
-    with open(filepath, 'w') as f:
-        f.write(zrif)
+def create_zrif_file(zrif, filename):
+    """Create a ZRIF file from a string, skipping the write if unchanged."""
+    static_store.write_file(PSV_ZRIFS_DIR, filename, zrif.encode('utf-8'))
 
 
 def add_ps3_links(result, links, base_url):
@@ -52,20 +50,12 @@ def add_ps3_links(result, links, base_url):
 
     if len(rap) == 32 and content_id:
         filename = f'{content_id}.rap'
-        filepath = os.path.join(PS3_RAPS_DIR, filename)
-        create_rap_file(rap, filepath)
-
-        links.append({
-            'name': name,
-            'type': 'RAP file',
-            'format': 'rap',
-            'url': join_urls(PS3_RAPS_BASE_URL, filename),
-            'filename': filename,
-            'host': HOST_NAME,
-            'size': 16,
-            'size_str': size_bytes_to_str(16),
-            'source_url': base_url
-        })
+        create_rap_file(rap, filename)
+
+        links.append(Link(
+            name, join_urls(PS3_RAPS_BASE_URL, filename), filename, 16,
+            get_link_source('RAP file', 'rap', HOST_NAME, base_url)
+        ))
 
 
 def add_psv_links(result, links, base_url):
@@ -76,23 +66,44 @@ def add_psv_links(result, links, base_url):
 
     if zrif and content_id:
         filename = content_id
-        filepath = os.path.join(PSV_ZRIFS_DIR, filename)
-        create_zrif_file(zrif, filepath)
-
-        links.append({
-            'name': name,
-            'type': 'ZRIF string',
-            'format': 'string',
-            'url': join_urls(PSV_ZRIFS_BASE_URL, filename),
-            'filename': filename,
-            'host': HOST_NAME,
-            'size': len(zrif),
-            'size_str': size_bytes_to_str(len(zrif)),
-            'source_url': base_url
-        })
-
-
-def parse_links(result, source, platform, base_url):
+        create_zrif_file(zrif, filename)
+
+        links.append(Link(
+            name, join_urls(PSV_ZRIFS_BASE_URL, filename), filename, len(zrif),
+            get_link_source('ZRIF string', 'string', HOST_NAME, base_url)
+        ))
+
+
+def is_manifest_url(url):
+    """Check if a PKG link points to an XML manifest listing multiple PKG pieces."""
+    return url.startswith('http') and url.endswith('.xml')
+
+
+def parse_manifest(response):
+    """Extract the PKG piece URLs from an XML manifest response."""
+    try:
+        root = ET.fromstring(response)
+    except ET.ParseError:
+        return None
+    return [piece.attrib['url'] for piece in root.findall('pieces')]
+
+
+def resolve_manifests(urls, use_cached):
+    """Fetch XML manifests concurrently and map each URL to its list of PKG piece URLs."""
+    if not urls:
+        return {}
+
+    responses = fetch_urls(urls, use_cached)
+    manifests = {url: parse_manifest(response) if response else None
+                 for url, response in responses.items()}
+
+    resolved = sum(1 for pieces in manifests.values() if pieces is not None)
+    print(f"      Multi-part manifests... {resolved}/{len(manifests)} resolved")
+
+    return manifests
+
+
+def parse_links(result, source, platform, base_url, manifests):
     """Parse links from the result and generate metadata for each link."""
     links = []
     url = result['PKG direct link']
@@ -102,41 +113,23 @@ def parse_links(result, source, platform, base_url):
     name = result['Name']
     filename = url.rstrip('/').split('/')[-1]
     size = round(float(result['File Size'])) if result['File Size'].isdigit() else 0
-    size_str = size_bytes_to_str(size) if size else 0
-
-    if url.endswith('.xml'):
-        # Handle XML files containing multiple URLs
-        r = requests.get(url)
-        if r.ok:
-            root = ET.fromstring(r.text)
-            urls = [piece.attrib['url'] for piece in root.findall('pieces')]
-            for i, url in enumerate(urls):
-                filename = url.rstrip('/').split('/')[-1]
-
-                links.append({
-                    'name': name,
-                    'type': f"{source['type']} #{i}",
-                    'format': source['format'],
-                    'url': url,
-                    'filename': filename,
-                    'host': HOST_NAME,
-                    'size': size,
-                    'size_str': size_str,
-                    'source_url': base_url
-                })
+
+    if is_manifest_url(url):
+        # Handle XML files containing multiple URLs (resolved beforehand)
+        urls = manifests.get(url) or []
+        for i, url in enumerate(urls):
+            filename = url.rstrip('/').split('/')[-1]
+
+            links.append(Link(
+                name, url, filename, size,
+                get_link_source(f"{source['type']} #{i}", source['format'], HOST_NAME, base_url)
+            ))
     else:
         # Handle direct links
-        links.append({
-            'name': name,
-            'type': source['type'],
-            'format': source['format'],
-            'url': url,
-            'filename': filename,
-            'host': HOST_NAME,
-            'size': size,
-            'size_str': size_str,
-            'source_url': base_url
-        })
+        links.append(Link(
+            name, url, filename, size,
+            get_link_source(source['type'], source['format'], HOST_NAME, base_url)
+        ))
 
     # Add platform-specific links
     if platform == 'ps3':
@@ -147,67 +140,62 @@ def parse_links(result, source, platform, base_url):
     return links
 
 
-def create_entry(result, source, platform, base_url):
+def create_entry(result, source, platform, base_url, manifests):
     """Create an entry for a ROM based on the result data."""
     rom_id = result['Title ID']
     name = result['Name']
     region = REGIONS_MAP.get(result['Region'], 'other')
-    links = parse_links(result, source, platform, base_url)
+    links = parse_links(result, source, platform, base_url, manifests)
+    pieces = manifests.get(result['PKG direct link'])
+
+    # TSV row used for delta detection: (source URL, Title ID, row contents and PKG pieces)
+    row = (base_url, rom_id, (tuple(result.values()), pieces))
 
-    return {
-        'rom_id': rom_id,
-        'title': name,
-        'platform': platform,
-        'regions': [region],
-        'links': links
-    }
+    return Entry(name, platform, [region], links, row=row, rom_id=rom_id)
 
 
-def parse_response(response, source, platform, base_url):
+def parse_response(response, source, platform, base_url, use_cached=False):
     """Parse the response and extract entries."""
     entries = []
-    results = csv.DictReader(io.StringIO(response), delimiter='\t')
+    results = list(csv.DictReader(io.StringIO(response), delimiter='\t'))
+
+    # Collect multi-part manifests first so they can be fetched in a single batch
+    manifest_urls = [result['PKG direct link'] for result in results
+                     if is_manifest_url(result['PKG direct link'] or '')]
+    manifests = resolve_manifests(manifest_urls, use_cached)
 
     for result in results:
-        entry = create_entry(result, source, platform, base_url)
-        if entry and entry['links']:
+        entry = create_entry(result, source, platform, base_url, manifests)
+        if entry and entry.links:
             entries.append(entry)
 
     return entries
 
 
-def fetch_response(url, use_cached):
-    """Fetch the response from a URL, optionally using a cached version."""
-    short_url = url.split('/')[-1][:50] if '/' in url else url[:50]
-
-    if use_cached:
-        response = cache_manager.get_cached_response(url)
-        if response:
-            print(f"      {short_url}... cached")
-            return response
+class NoPayStationScraper(Scraper):
+    """Scraper for NoPayStation TSV databases."""
 
-    return fetch_url(url)
+    host_name = HOST_NAME
+    supports_streaming = True
+    supports_conditional_get = True
 
+    def rebuild_entry(self, name, source, platform, rom_id, regions):
+        """Rebuild an entry from its stored link name, keeping the Title ID and region read from the TSV."""
+        return Entry(name, platform, regions, [], rom_id=rom_id)
 
-def scrape(source, platform, use_cached=False):
-    """Scrape data from the source and extract entries."""
-    # Ensure directories exist
-    for path in (PS3_RAPS_DIR, PSV_ZRIFS_DIR):
-        os.makedirs(path, exist_ok=True)
+    async def process_listing(self, response, url, source, platform, use_cached):
+        """Parse a TSV response, resolving its multi-part manifests off the event loop."""
+        return await asyncio.to_thread(
+            parse_response, response, source, platform, url, use_cached)
 
-    entries = []
+    async def iter_entries(self, source, platform, use_cached=False):
+        """Yield the entries of all TSVs of a source, then persist the generated static files."""
+        async for entry in super().iter_entries(source, platform, use_cached):
+            yield entry
 
-    for url in source['urls']:
-        response = fetch_response(url, use_cached)
-        if not response:
-            print(f"Warning: Failed to get response from {url}, skipping...")
-            continue
+        # Persist hashes of written RAP/ZRIF files so unchanged ones are skipped next build
+        static_store.flush()
 
-        parsed_entries = parse_response(response, source, platform, url)
-        if not parsed_entries:
-            print(f"Warning: No entries parsed from {url}, skipping...")
-            continue
 
-        entries.extend(parsed_entries)
-
-    return entries
+SCRAPER = NoPayStationScraper()
+scrape = SCRAPER.scrape
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+This script benchmarks the GameTDB title matching index against the original linear scan.
+It matches titles derived from the TDB names themselves for the Wii and Nintendo DS sets,
+checks that both matchers return the same game for every title, and prints their timings.
+"""
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import gametdb
+from utils.parse_utils import create_search_key
+
+# Platforms to benchmark and the maximum number of titles matched for each
+BENCHMARK_PLATFORMS = ['wii', 'nds']
+MAX_TITLES = 2000
+
+
+def find_best_match_linear(title, platform, regions, xml_filename):
+    """Find the best matching game with the original scan over every TDB game."""
+    title_compare_value = create_search_key(re.sub(r"\(.*", '', title))
+
+    best_match = None
+    best_match_name = None
+
+    for game in gametdb.get_tdb(xml_filename):
+        if platform != gametdb.TYPE_PLATFORM_MAP[xml_filename].get(game.type, platform):
+            continue
+
+        game_region = gametdb.REGION_REGION_MAP.get(game.region)
+        if regions and game_region not in regions:
+            continue
+
+        name_compare_value = create_search_key(re.sub(r"\(.*", '', game.name))
+        if title_compare_value not in name_compare_value:
+            continue
+
+        if not best_match_name or len(name_compare_value) < len(best_match_name):
+            best_match = game
+            best_match_name = game.name
+
+    return best_match
+
+
+def get_benchmark_titles(xml_filename):
+    """Build (title, regions) queries from TDB names: full names, short prefixes and no-region variants."""
+    titles = []
+    for game in gametdb.get_tdb(xml_filename)[:MAX_TITLES // 2]:
+        if not game.name:
+            continue
+        region = gametdb.REGION_REGION_MAP.get(game.region)
+        titles.append((f'{game.name} (USA)', [region] if region else []))
+        titles.append((game.name.split(' ')[0], []))
+    return titles
+
+
+def benchmark_gametdb_matching():
+    """Compare the indexed and linear matchers on each benchmark platform."""
+    for platform in BENCHMARK_PLATFORMS:
+        xml_filename = gametdb.PLATFORM_XML_MAP[platform]
+        titles = get_benchmark_titles(xml_filename)
+        if not titles:
+            print(f"{platform}: no games in {xml_filename}, skipping...")
+            continue
+
+        start = time.perf_counter()
+        linear_matches = [find_best_match_linear(title, platform, regions, xml_filename)
+                          for title, regions in titles]
+        linear_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gametdb.get_title_index(xml_filename)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed_matches = [gametdb.find_best_match(title, platform, regions, xml_filename)
+                           for title, regions in titles]
+        indexed_time = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(linear_matches, indexed_matches) if a is not b)
+        print(f"{platform}: {len(titles)} titles, {len(gametdb.get_tdb(xml_filename))} games")
+        print(f"  linear:  {linear_time:.3f}s")
+        print(f"  indexed: {indexed_time:.3f}s (+{build_time:.3f}s to build the index), "
+              f"{linear_time / max(indexed_time, 1e-9):.0f}x faster")
+        print(f"  mismatches: {mismatches}")
+
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Change the working directory to main db repository location
+    os.chdir(os.path.dirname(os.path.realpath(__file__)))
+    os.chdir('../')
+
+    benchmark_gametdb_matching()
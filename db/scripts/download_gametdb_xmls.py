@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 """
 This script downloads and extracts GameTDB XML files.
-Uses cloudscraper to bypass Cloudflare protection.
+Uses cloudscraper to bypass Cloudflare protection. Every zip is revalidated against the
+ETag or Last-Modified date (and size) recorded by the previous download, so unchanged files are
+not downloaded again. Zips are streamed to disk and extracted member by member, concurrently.
 """
+import json
 import os
+import shutil
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,16 +25,22 @@ DOWNLOADS = [
     {'url': 'https://www.gametdb.com/ps3tdb.zip?LANG=EN', 'xml': 'ps3tdb.xml', 'referer': 'https://www.gametdb.com/PS3/Downloads'},
 ]
 
+# Destination directory for the extracted XML files
+DESTINATION = 'data/gametdb'
 
-def download_gametdb_xmls():
-    """Download and extract GameTDB XML files."""
-    print("Downloading GameTDB XML files...")
+# File recording the validators (ETag, Last-Modified, size) of the last download of each zip
+VALIDATORS_FILE = os.path.join(DESTINATION, 'downloads.json')
+
+# Size of the chunks streamed to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Smallest plausible zip size, smaller responses are error pages
+MIN_ZIP_SIZE = 1000
 
-    destination = 'data/gametdb'
-    os.makedirs(destination, exist_ok=True)
 
-    # Create cloudscraper session (bypasses Cloudflare)
-    session = cloudscraper.create_scraper(
+def create_session():
+    """Create a cloudscraper session (bypasses Cloudflare)."""
+    return cloudscraper.create_scraper(
         browser={
             'browser': 'chrome',
             'platform': 'windows',
@@ -37,48 +48,136 @@ def download_gametdb_xmls():
         }
     )
 
-    success_count = 0
-
-    for item in DOWNLOADS:
-        xml_file = item['xml']
-        xml_file_path = os.path.join(destination, xml_file)
-        zip_file_name = item['url'].split('/')[-1].split('?')[0]
-        zip_file_path = os.path.join(destination, zip_file_name)
-
-        # Skip if already exists
-        if os.path.exists(xml_file_path):
-            print(f"  {xml_file}: cached")
-            success_count += 1
-            continue
-
-        print(f"  {xml_file}: ", end='', flush=True)
-
-        try:
-            # Set referer header for this request
-            response = session.get(
-                item['url'],
-                headers={'Referer': item['referer']},
-                timeout=120
-            )
-
-            if response.ok and len(response.content) > 1000:
-                # Save zip
-                with open(zip_file_path, 'wb') as f:
-                    f.write(response.content)
-
-                # Extract
-                with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-                    zip_ref.extractall(destination)
-                os.remove(zip_file_path)
-                print("OK")
-                success_count += 1
-            else:
-                print(f"failed ({response.status_code})")
-
-        except Exception as e:
-            print(f"failed ({e})")
-            if os.path.exists(zip_file_path):
-                os.remove(zip_file_path)
+
+def load_validators():
+    """Load the validators recorded for each download URL."""
+    try:
+        with open(VALIDATORS_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_validators(validators):
+    """Save the validators recorded for each download URL."""
+    with open(VALIDATORS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(validators, f, indent=2, sort_keys=True)
+
+
+def get_validators(response):
+    """Extract the validators of a download response."""
+    size = response.headers.get('Content-Length')
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'size': int(size) if size and size.isdigit() else None
+    }
+
+
+def is_unchanged(validators, previous):
+    """Check if a response describes the same zip as the previous download.
+
+    The strongest validator both have must match: the ETag, then Last-Modified. GameTDB builds
+    the zips on demand, so an update can keep the same size, which is only checked on top of
+    them. Sizes are compared as sent in Content-Length, since a compressed transfer decodes to
+    more bytes.
+    """
+    for key in ('etag', 'last_modified'):
+        if validators[key] is not None and previous.get(key) is not None:
+            if validators[key] != previous[key]:
+                return False
+            return (validators['size'] is None or previous.get('size') is None
+                    or validators['size'] == previous['size'])
+    return False
+
+
+def extract_zip(zip_file_path, destination):
+    """Extract the members of a zip one by one, streaming each to a temporary file first."""
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        for member in zip_ref.infolist():
+            if member.is_dir():
+                continue
+            target = os.path.join(destination, os.path.basename(member.filename))
+            temp_target = f'{target}.part'
+            with zip_ref.open(member) as source, open(temp_target, 'wb') as f:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+            os.replace(temp_target, target)
+
+
+def download_item(item, previous):
+    """Revalidate and, if it changed, download and extract a single GameTDB zip.
+
+    Returns:
+        A tuple of the status to print, whether the XML is available, and the new validators
+    """
+    xml_file_path = os.path.join(DESTINATION, item['xml'])
+    zip_file_name = item['url'].split('/')[-1].split('?')[0]
+    zip_file_path = os.path.join(DESTINATION, f'{zip_file_name}.part')
+    cached = os.path.exists(xml_file_path)
+
+    # Only revalidate files that are still on disk
+    headers = {'Referer': item['referer']}
+    if cached and previous:
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    try:
+        with create_session().get(item['url'], headers=headers, timeout=120, stream=True) as response:
+            if cached and response.status_code == 304:
+                return "unchanged", True, previous
+
+            if not response.ok:
+                status = f"failed ({response.status_code})"
+                return (f"{status}, using cached" if cached else status), cached, previous
+
+            validators = get_validators(response)
+            if cached and previous and is_unchanged(validators, previous):
+                return "unchanged", True, previous
+
+            # Stream the zip to disk
+            size = 0
+            with open(zip_file_path, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+
+        if size <= MIN_ZIP_SIZE:
+            status = f"failed ({size} bytes)"
+            return (f"{status}, using cached" if cached else status), cached, previous
+
+        extract_zip(zip_file_path, DESTINATION)
+        return "OK", True, validators
+
+    except Exception as e:
+        status = f"failed ({e})"
+        return (f"{status}, using cached" if cached else status), cached, previous
+
+    finally:
+        if os.path.exists(zip_file_path):
+            os.remove(zip_file_path)
+
+
+def download_gametdb_xmls():
+    """Download and extract GameTDB XML files that changed since the last download."""
+    print("Downloading GameTDB XML files...")
+
+    os.makedirs(DESTINATION, exist_ok=True)
+    validators = load_validators()
+
+    with ThreadPoolExecutor(max_workers=len(DOWNLOADS)) as executor:
+        results = executor.map(
+            lambda item: download_item(item, validators.get(item['url'])), DOWNLOADS)
+
+        success_count = 0
+        for item, (status, available, item_validators) in zip(DOWNLOADS, results):
+            print(f"  {item['xml']}: {status}")
+            success_count += available
+            if item_validators:
+                validators[item['url']] = item_validators
+
+    save_validators(validators)
 
     print(f"GameTDB: {success_count}/{len(DOWNLOADS)} files")
 
@@ -0,0 +1,80 @@
+"""Tests for parsing entries in worker processes while the compiled reference indexes are cold."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from make import prepare_parsers
+from parsers import gametdb
+from utils import cache_manager, parser_pool
+from utils.records import Entry
+
+JOBS = 4
+
+GAMES = [(f'Test Game {i:02d} Wii', f'R{i:02d}E01', 'Wii', 'NTSC-U') for i in range(50)]
+
+# Games no entry matches, so compiling the index takes long enough for the workers to overlap
+FILLER_GAMES = [(f'Filler {i:05d}', f'F{i:05d}', 'Wii', 'PAL') for i in range(50000)]
+
+
+def write_tdb(games):
+    """Write a minimal Wii TDB XML file listing the given games."""
+    os.makedirs(gametdb.TDBS_DIR, exist_ok=True)
+    with open(os.path.join(gametdb.TDBS_DIR, 'wiitdb.xml'), 'w', encoding='utf-8') as f:
+        f.write('<datafile>\n')
+        for name, id, type, region in games:
+            f.write(f'<game name="{name}"><id>{id}</id><type>{type}</type>'
+                    f'<region>{region}</region></game>\n')
+        f.write('</datafile>\n')
+
+
+def create_entries():
+    """Create enough entries for the pool to split them across the workers."""
+    return [Entry(f'{GAMES[i % len(GAMES)][0]} (USA)', 'wii', ['us'], [])
+            for i in range(parser_pool.MIN_PARALLEL_ENTRIES * 2)]
+
+
+@pytest.fixture
+def cold_cache(tmp_path, monkeypatch):
+    """Run in an empty directory with a TDB file, no compiled indexes and no loaded data."""
+    monkeypatch.chdir(tmp_path)
+    for name in ('tdbs', 'tdb_indexes', 'title_indexes'):
+        monkeypatch.setattr(gametdb, name, {})
+    write_tdb(GAMES + FILLER_GAMES)
+    yield
+    parser_pool.shutdown()
+
+
+def get_compiled_files():
+    """List the compiled index files, including leftover temporary files."""
+    return sorted(os.listdir(cache_manager.COMPILED_DIRNAME))
+
+
+def check_parsed(entries):
+    """Check that every entry was matched with its game."""
+    for entry in entries:
+        assert entry.alt_titles == (entry.title.split(' (')[0],)
+        assert entry.boxart_url is not None
+
+
+def test_build_with_prepared_parsers(cold_cache):
+    """Workers forked after `prepare` parse with the indexes loaded by the main process."""
+    prepare_parsers({'gametdb': [('wii', {})]})
+    parser_pool.start(JOBS)
+
+    entries = parser_pool.parse_entries(create_entries(), [('gametdb', {})])
+
+    check_parsed(entries)
+    assert get_compiled_files() == ['gametdb-wiitdb.xml.pickle']
+
+
+def test_workers_compiling_the_same_index(cold_cache):
+    """Workers that all compile a missing index at once each write a complete copy of it."""
+    parser_pool.start(JOBS)
+
+    entries = parser_pool.parse_entries(create_entries(), [('gametdb', {})])
+
+    check_parsed(entries)
+    assert get_compiled_files() == ['gametdb-wiitdb.xml.pickle']
@@ -1,15 +1,22 @@
 """
 This module provides utility functions for caching HTTP responses to a local directory.
 It includes functionality to sanitize URLs into valid filenames, save responses to cache,
-and retrieve cached responses with optional expiration.
+and retrieve cached responses with optional expiration. It also stores compiled indexes of
+reference data, keyed by a signature of the files they were built from.
 """
+import json
 import os
+import pickle
 import re
+import tempfile
 import time
 
 # Directory name where cached responses will be stored
 CACHE_DIRNAME = 'cache'
 
+# Directory name where compiled reference data indexes will be stored
+COMPILED_DIRNAME = os.path.join(CACHE_DIRNAME, 'compiled')
+
 # Cache expiration in days (0 = never expire)
 CACHE_MAX_AGE_DAYS = 7
 
@@ -56,6 +63,33 @@ def get_cached_response(url, max_age_days=CACHE_MAX_AGE_DAYS):
         return f.read()
 
 
+def cache_validators(url, headers):
+    """Cache the HTTP validators (ETag, Last-Modified) of a response for conditional requests."""
+    validators = {name: headers[name] for name in ('ETag', 'Last-Modified') if headers.get(name)}
+    if not validators:
+        return
+
+    filename = get_cached_response_filename(url)
+    with open(f'{CACHE_DIRNAME}/{filename}.validators.json', 'w', encoding='utf-8') as f:
+        json.dump(validators, f)
+
+
+def get_cached_validators(url):
+    """Retrieve the cached HTTP validators of a URL, or an empty dict if there are none."""
+    filename = get_cached_response_filename(url)
+    try:
+        with open(f'{CACHE_DIRNAME}/{filename}.validators.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def touch_cached_response(url):
+    """Mark a cached response as fresh after the server confirmed it is unchanged."""
+    filename = get_cached_response_filename(url)
+    os.utime(f'{CACHE_DIRNAME}/{filename}')
+
+
 def get_cache_age_days(url):
     """Get the age of a cached response in days, or None if not cached."""
     filename = get_cached_response_filename(url)
@@ -65,3 +99,56 @@ def get_cache_age_days(url):
         return None
 
     return (time.time() - os.path.getmtime(filepath)) / 86400
+
+
+def get_file_signature(paths):
+    """Build a cheap signature (path, size, modification time) for a list of files.
+
+    Missing files are included with a None size, so their later appearance changes the signature.
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return signature
+
+
+def get_compiled_index(name, signature):
+    """Retrieve a compiled index if it was built from data with the given signature.
+
+    Args:
+        name: The name of the index
+        signature: A picklable value describing the source data (see `get_file_signature`)
+
+    Returns:
+        The compiled index or None if it does not exist or is outdated
+    """
+    filepath = os.path.join(COMPILED_DIRNAME, f'{get_cached_response_filename(name)}.pickle')
+    try:
+        with open(filepath, 'rb') as f:
+            cached_signature, index = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError):
+        return None
+
+    return index if cached_signature == signature else None
+
+
+def cache_compiled_index(name, signature, index):
+    """Save a compiled index together with the signature of the data it was built from.
+
+    The index is written to a temporary file unique to the caller first, so processes compiling
+    the same index at once each replace the file with a complete copy.
+    """
+    os.makedirs(COMPILED_DIRNAME, exist_ok=True)
+    filepath = os.path.join(COMPILED_DIRNAME, f'{get_cached_response_filename(name)}.pickle')
+    with tempfile.NamedTemporaryFile(dir=COMPILED_DIRNAME, suffix='.tmp', delete=False) as f:
+        try:
+            pickle.dump((signature, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, filepath)
@@ -0,0 +1,121 @@
+"""
+This module provides listing-level delta detection between scraper runs.
+Scrapers tag every entry with a `row` of (source URL, key, fingerprint). The parsed entries of the
+previous run are kept in a snapshot per source, so only rows that were added or changed since then
+have to go through the parser chain again.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+from utils.cache_manager import CACHE_DIRNAME
+
+# Directory where per-source snapshots are stored
+DELTA_DIRNAME = os.path.join(CACHE_DIRNAME, 'delta')
+
+# Version of the snapshot format, to be bumped whenever the stored records change
+SNAPSHOT_VERSION = 4
+
+
+def get_snapshot_path(source, platform, data_signature):
+    """Get the snapshot path for a source, keyed by its configuration and reference data."""
+    key = json.dumps([SNAPSHOT_VERSION, platform, source, data_signature], sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DELTA_DIRNAME, f'{platform}-{source["scraper"]}-{digest}.pickle')
+
+
+def load_snapshot(path):
+    """Load a snapshot mapping (source URL, key) to (fingerprint, parsed entries)."""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def save_snapshot(path, rows):
+    """Save the rows of the current run as the snapshot for the next one."""
+    os.makedirs(DELTA_DIRNAME, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def group_rows(entries):
+    """Group scraped entries by their row, keeping the listing order.
+
+    Entries without a row cannot be compared and are grouped under a unique ID.
+    """
+    rows = {}
+    for i, entry in enumerate(entries):
+        row = entry.row
+        if row:
+            source_url, key, fingerprint = row
+            row_id = (source_url, key)
+        else:
+            row_id, fingerprint = (None, i), None
+
+        if row_id in rows:
+            fingerprints, group = rows[row_id]
+            rows[row_id] = (fingerprints + (fingerprint,), group + [entry])
+        else:
+            rows[row_id] = ((fingerprint,), [entry])
+    return rows
+
+
+def diff_rows(rows, snapshot):
+    """Compare the current rows with the snapshot.
+
+    Returns:
+        The entries that need parsing, and a dict mapping each source URL to its
+        count of added, removed, changed and unchanged rows
+    """
+    changed_entries = []
+    report = {}
+
+    def counts(source_url):
+        return report.setdefault(source_url, {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0})
+
+    for row_id, (fingerprints, group) in rows.items():
+        source_url = row_id[0]
+        previous = snapshot.get(row_id)
+        if source_url is None:
+            changed_entries.extend(group)
+        elif previous is None:
+            counts(source_url)['added'] += 1
+            changed_entries.extend(group)
+        elif previous[0] != fingerprints:
+            counts(source_url)['changed'] += 1
+            changed_entries.extend(group)
+        else:
+            counts(source_url)['unchanged'] += 1
+
+    for row_id in snapshot:
+        if row_id not in rows:
+            counts(row_id[0])['removed'] += 1
+
+    return changed_entries, report
+
+
+def merge_rows(rows, snapshot):
+    """Build the final entry list, reusing parsed entries of unchanged rows from the snapshot.
+
+    Must be called after the changed entries went through the parsers, which update them in place.
+
+    Returns:
+        The merged entries in listing order, and the new snapshot
+    """
+    entries = []
+    new_snapshot = {}
+
+    for row_id, (fingerprints, group) in rows.items():
+        previous = snapshot.get(row_id)
+        if row_id[0] is not None and previous is not None and previous[0] == fingerprints:
+            group = previous[1]
+        entries.extend(group)
+        if row_id[0] is not None:
+            new_snapshot[row_id] = (fingerprints, group)
+
+    return entries, new_snapshot
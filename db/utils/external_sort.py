@@ -0,0 +1,116 @@
+"""
+This module provides a memory-bounded way to collect the entries of all sources before inserting them.
+Entries are buffered until the process resident set size exceeds a budget, then sorted by slug and
+spilled to a temporary file as a run. The resident set size does not drop after a spill, so the number
+of entries buffered at the first spill sets the size of all later runs. A k-way merge of the runs yields every entry ordered by slug,
+keeping the collection order of entries that share a slug, so the database sees the same merges.
+"""
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+
+from utils.parse_utils import create_slug
+
+# Number of added entries between two checks of the resident set size
+CHECK_INTERVAL = 1000
+
+# Smallest run worth spilling, so a budget below the baseline memory use does not create tiny runs
+MIN_RUN_ENTRIES = 10000
+
+# Run size used when the resident set size cannot be read
+FALLBACK_RUN_ENTRIES = 100000
+
+# Number of entries pickled together in a run file
+BATCH_SIZE = 1000
+
+
+def get_rss():
+    """Get the resident set size of the current process in bytes, or None if unavailable."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_run(path):
+    """Stream the (slug, sequence, entry) records of a run file in order."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+class EntrySorter:
+    """Collects entries in sorted runs spilled to disk and merges them back by slug."""
+
+    def __init__(self, memory_budget):
+        """
+        Args:
+            memory_budget: The resident set size in bytes above which buffered entries are spilled
+        """
+        self.memory_budget = memory_budget
+        self.buffer = []
+        self.runs = []
+        self.sequence = 0
+        self.directory = None
+        # Number of entries per run, measured when the budget is first exceeded
+        self.run_entries = None
+
+    def add(self, entry):
+        """Add an entry, spilling the buffered entries to a run if they fill the memory budget."""
+        entry.slug = create_slug(entry)
+        self.buffer.append((entry.slug, self.sequence, entry))
+        self.sequence += 1
+
+        if self.run_entries is not None:
+            if len(self.buffer) >= self.run_entries:
+                self.spill()
+        elif len(self.buffer) % CHECK_INTERVAL == 0 and len(self.buffer) >= MIN_RUN_ENTRIES:
+            rss = get_rss()
+            if rss is None:
+                self.run_entries = FALLBACK_RUN_ENTRIES
+            elif rss > self.memory_budget:
+                self.run_entries = len(self.buffer)
+                self.spill()
+
+    def spill(self):
+        """Sort the buffered entries by slug and write them to a new run file."""
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='romdb-runs-')
+
+        self.buffer.sort(key=lambda record: record[:2])
+        path = os.path.join(self.directory, f'{len(self.runs)}.run')
+        with open(path, 'wb') as f:
+            for i in range(0, len(self.buffer), BATCH_SIZE):
+                pickle.dump(self.buffer[i:i + BATCH_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        print(f"      Spilled {len(self.buffer)} entries to run {len(self.runs) + 1}")
+        self.runs.append(path)
+        self.buffer = []
+
+    def merge(self):
+        """Yield all added entries ordered by slug, then by the order they were added in."""
+        try:
+            if not self.runs:
+                self.buffer.sort(key=lambda record: record[:2])
+                records = self.buffer
+            else:
+                if self.buffer:
+                    self.spill()
+                records = heapq.merge(*(read_run(path) for path in self.runs),
+                                      key=lambda record: record[:2])
+
+            for _, _, entry in records:
+                yield entry
+        finally:
+            self.buffer = []
+            self.runs = []
+            if self.directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+                self.directory = None
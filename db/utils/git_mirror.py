@@ -0,0 +1,152 @@
+"""
+This module keeps persistent sparse clones of the Git repositories reference data comes from.
+A clone is only checked out for the paths that are actually used and is updated with a shallow
+fetch. The blob IDs of the checked out files are compared with those recorded by the previous
+update, so only changed files are copied to the data directory. The revision and blob IDs are
+recorded next to the copied files, where parsers use them as cache signatures.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from utils.cache_manager import CACHE_DIRNAME
+
+# Directory where the persistent clones are kept
+CLONES_DIRNAME = os.path.join(CACHE_DIRNAME, 'git')
+
+# Name of the file recording the revision and blob IDs of the copied files
+MANIFEST_FILENAME = 'revision.json'
+
+# Characters with a special meaning in sparse-checkout patterns
+PATTERN_SPECIAL_CHARS = '\\*?[]!#'
+
+
+def run_git(*args):
+    """Run a git command and return its output."""
+    return subprocess.run(
+        ['git', *args],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+
+def get_sparse_pattern(path):
+    """Get the non-cone sparse-checkout pattern that matches exactly a file or directory path."""
+    escaped = ''.join(f'\\{c}' if c in PATTERN_SPECIAL_CHARS else c for c in path)
+    return f'/{escaped}'
+
+
+def get_manifest_path(destination):
+    """Get the path of the manifest recorded in a destination directory."""
+    return os.path.join(destination, MANIFEST_FILENAME)
+
+
+def load_manifest(destination):
+    """Load the revision and file blob IDs recorded in a destination directory.
+
+    Returns:
+        A dict with the `revision` and the `files` mapping each path to its blob ID,
+        or None if nothing was recorded
+    """
+    try:
+        with open(get_manifest_path(destination), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def get_blob_ids(clone_dir, paths):
+    """List the blob ID of every file under the given paths at the checked out revision."""
+    output = run_git('-C', clone_dir, 'ls-tree', '-r', '-z', 'HEAD', '--', *paths)
+    blob_ids = {}
+    for line in output.split('\0'):
+        if not line:
+            continue
+        info, path = line.split('\t', 1)
+        _, object_type, blob_id = info.split()
+        if object_type == 'blob':
+            blob_ids[path] = blob_id
+    return blob_ids
+
+
+def update_clone(name, repo_url, paths):
+    """Create or update the persistent sparse clone of a repository.
+
+    Returns:
+        The path of the clone
+    """
+    if not shutil.which('git'):
+        print("Git is not installed or not found in PATH. Please install Git to proceed.")
+        sys.exit(1)
+
+    clone_dir = os.path.join(CLONES_DIRNAME, name)
+    patterns = '\n'.join(get_sparse_pattern(path) for path in paths) + '\n'
+
+    if not os.path.isdir(os.path.join(clone_dir, '.git')):
+        if os.path.exists(clone_dir):
+            shutil.rmtree(clone_dir)
+        run_git('clone', '--depth', '1', '--filter=blob:none', '--no-checkout', repo_url, clone_dir)
+    else:
+        run_git('-C', clone_dir, 'fetch', '--depth', '1', 'origin', 'HEAD')
+        run_git('-C', clone_dir, 'update-ref', 'HEAD', 'FETCH_HEAD')
+
+    # Check out only the used paths, which also picks up paths added since the last update
+    subprocess.run(
+        ['git', '-C', clone_dir, 'sparse-checkout', 'set', '--no-cone', '--stdin'],
+        input=patterns,
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    run_git('-C', clone_dir, 'reset', '--hard', 'HEAD')
+
+    return clone_dir
+
+
+def sync_repository(name, repo_url, paths, destination):
+    """Update the clone of a repository and copy the files that changed to a destination.
+
+    Args:
+        name: The name of the persistent clone
+        repo_url: The URL of the repository
+        paths: The file and directory paths to check out, relative to the repository root
+        destination: The directory the files are copied to, keeping their relative paths
+
+    Returns:
+        The checked out revision
+    """
+    clone_dir = update_clone(name, repo_url, paths)
+    revision = run_git('-C', clone_dir, 'rev-parse', 'HEAD').strip()
+    blob_ids = get_blob_ids(clone_dir, paths)
+
+    previous = load_manifest(destination) or {}
+    previous_blob_ids = previous.get('files', {})
+
+    copied = 0
+    for path, blob_id in blob_ids.items():
+        target = os.path.join(destination, path)
+        if previous_blob_ids.get(path) == blob_id and os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(clone_dir, path), target)
+        copied += 1
+
+    # Remove files that were deleted upstream or are no longer used
+    removed = 0
+    for path in previous_blob_ids.keys() - blob_ids.keys():
+        target = os.path.join(destination, path)
+        if os.path.exists(target):
+            os.remove(target)
+            removed += 1
+
+    os.makedirs(destination, exist_ok=True)
+    with open(get_manifest_path(destination), 'w', encoding='utf-8') as f:
+        json.dump({'revision': revision, 'files': blob_ids}, f, indent=2, sort_keys=True)
+
+    print(f"  {revision[:12]}: {copied} files updated, {removed} removed, "
+          f"{len(blob_ids) - copied} unchanged")
+
+    return revision
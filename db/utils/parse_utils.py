@@ -6,20 +6,32 @@ creating slugs, and converting between human-readable and byte-based file sizes.
 import os
 import re
 import urllib
+from functools import lru_cache
 from unidecode import unidecode
 
+# Translation table replacing invalid characters with valid substitutes
+INVALID_CHARS_TABLE = str.maketrans({
+    '+': ' plus ',
+    '&': ' and ',
+    '™': '  ',
+    '©': '  ',
+    '®': '  '
+})
+
+# Maximum number of memoized title keys, shared by all callers
+TITLE_KEYS_CACHE_SIZE = 1 << 16
+
+# Patterns matching the characters removed from slugs and search keys
+SLUG_INVALID_PATTERN = re.compile(r"[^a-zA-Z0-9-]")
+SEARCH_KEY_INVALID_PATTERN = re.compile(r"[^a-z0-9]")
+
+# Pattern matching repeated dashes in slugs
+DASHES_PATTERN = re.compile('-+')
+
 
 def replace_invalid_chars(title):
     """Replace invalid characters in a string with valid substitutes."""
-    for value1, value2 in {
-        '+': 'plus',
-        '&': 'and',
-        '™': '',
-        '©': '',
-        '®': ''
-    }.items():
-        title = title.replace(value1, f' {value2} ')
-    return title
+    return title.translate(INVALID_CHARS_TABLE)
 
 
 def remove_ext(filename):
@@ -39,44 +51,49 @@ def normalize_repeated_chars(text, char):
     return re.sub(f'{escaped_char}+', char, text).strip()
 
 
-def create_slug(entry):
-    """Create a URL-friendly slug from an entry dictionary."""
-    title = entry['title']
+def get_slug_part(text):
+    """Turn text into dash-separated slug characters, without leading or trailing dashes."""
+    return DASHES_PATTERN.sub('-', SLUG_INVALID_PATTERN.sub('-', text).lower()).strip('-')
+
+
+@lru_cache(maxsize=TITLE_KEYS_CACHE_SIZE)
+def get_title_keys(title):
+    """Transliterate a title once and derive the keys used to identify and search it.
 
-    title = replace_invalid_chars(title)
-    title = unidecode(title)
-    platform = entry['platform']
-    regions = '-'.join(entry['regions'])
-    slug = f"{title}-{platform}-{regions}"
-    
-    slug = re.sub(r"[^a-zA-Z0-9-]", '-', slug).lower()
-    slug = normalize_repeated_chars(slug, '-').strip('-')
+    Returns:
+        A tuple of the slug part of the title and its search key
+    """
+    # Transliterating ASCII text is a no-op, and only '+' and '&' need replacing in it
+    if not title.isascii():
+        title = unidecode(replace_invalid_chars(title))
+    elif '+' in title or '&' in title:
+        title = replace_invalid_chars(title)
+
+    slug_part = get_slug_part(title)
+    search_key = SEARCH_KEY_INVALID_PATTERN.sub('', title.lower())
+
+    return slug_part, search_key
+
+
+@lru_cache(maxsize=256)
+def get_slug_suffix(suffix):
+    """Get the slug part for a platform and its regions, which repeat across entries."""
+    return get_slug_part(suffix)
+
+
+def create_slug(entry):
+    """Create a URL-friendly slug from an entry."""
+    title_part = get_title_keys(entry.title)[0]
+    platform = entry.platform
+    regions = '-'.join(entry.regions)
+    suffix_part = get_slug_suffix(f"{platform}-{regions}")
 
-    return slug
+    return '-'.join(part for part in (title_part, suffix_part) if part)
 
 
 def create_search_key(title):
     """Generate a search-friendly key from the given title by normalizing and sanitizing it."""
-    title = replace_invalid_chars(title)
-    title = unidecode(title)
-    title = title.lower()
-    title = re.sub(r"[^a-z0-9]", '', title)
-    title = title.strip()
-
-    return title
-
-
-def size_bytes_to_str(size):
-    """Convert a size in bytes to a human-readable string with appropriate units."""
-    suffixes = ['B', 'K', 'M', 'G', 'T', 'P']
-    i = 0
-    while size >= 1024 and i < len(suffixes) - 1:
-        size /= 1024.0
-        i += 1
-
-    # Format the size to two decimal places and remove trailing zeros
-    f = ('%.2f' % size).rstrip('0').rstrip('.')
-    return '%s%s' % (f, suffixes[i])
+    return get_title_keys(title)[1]
 
 
 def size_str_to_bytes(size_str):
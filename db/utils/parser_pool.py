@@ -0,0 +1,120 @@
+"""
+This module provides a process pool that runs the parser chain of a source over chunks of entries.
+Parsers only do CPU work on independent entries, so large sources are split into chunks parsed by
+worker processes. Only the fields parsers work on are sent to the workers, links and listing rows
+stay in the main process. The `prepare` hooks of the parsers load the reference indexes (DAT
+maps, TDB data, MAME software lists) of every configured platform, and workers are forked after
+them, so they inherit the indexes instead of loading them again. Parsed fields are written back
+onto the entries in their original order.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import registry
+from utils.records import Entry
+
+# Sources with fewer changed entries are parsed in the main process, as the pool would not pay off
+MIN_PARALLEL_ENTRIES = 2000
+
+# Number of chunks per worker, so workers that finish early can pick up more work
+CHUNKS_PER_WORKER = 4
+
+# Entry fields that parsers read and update, sent to and from the workers
+PARSED_FIELDS = ('title', 'platform', 'regions', 'rom_id', 'roms', 'boxart_url', 'alt_titles')
+
+# Process pool used to parse entries, or None to parse in the main process
+_executor = None
+
+# Number of worker processes in the pool
+_jobs = 1
+
+
+def is_worker():
+    """Check if the current process is a pool worker rather than the main process."""
+    return multiprocessing.parent_process() is not None
+
+
+def _warm_up(_):
+    """Do nothing, used to fork every worker when the pool is started."""
+
+
+def _run_chain(chain, entries):
+    """Run a parser chain over a list of entries."""
+    for parser_name, parser_flags in chain:
+        parser = registry.get_plugin('parsers', parser_name)
+        entries = parser.parse(entries, parser_flags)
+    return entries
+
+
+def _parse_chunk(chain, chunk):
+    """Run a parser chain in a worker over the parsed fields of a chunk of entries."""
+    entries = []
+    for title, platform, regions, rom_id, roms, boxart_url, alt_titles in chunk:
+        entry = Entry(title, platform, regions, [], rom_id=rom_id)
+        entry.roms = roms
+        entry.boxart_url = boxart_url
+        entry.alt_titles = alt_titles
+        entries.append(entry)
+
+    entries = _run_chain(chain, entries)
+    return [tuple(getattr(entry, field) for field in PARSED_FIELDS) for entry in entries]
+
+
+def start(jobs):
+    """Start the worker processes, to be called once the parsers are prepared.
+
+    Workers are forked right away rather than on the first parsed source, as the scrapers start
+    threads (like the Playwright one) that forked processes must not inherit.
+
+    Args:
+        jobs: The number of worker processes, parsing stays in the main process if less than 2
+    """
+    global _executor, _jobs
+
+    _jobs = jobs
+    if jobs > 1:
+        _executor = ProcessPoolExecutor(max_workers=jobs,
+                                        mp_context=multiprocessing.get_context('fork'))
+        list(_executor.map(_warm_up, range(jobs)))
+
+
+def shutdown():
+    """Stop the worker processes."""
+    global _executor
+
+    if _executor:
+        _executor.shutdown()
+        _executor = None
+
+
+def parse_entries(entries, chain):
+    """Run a parser chain over entries, spreading them across the workers when worth it.
+
+    Entries are updated in place, like parsers do.
+
+    Args:
+        entries: The entries to parse
+        chain: A list of (parser name, flags) in the order the parsers run
+
+    Returns:
+        The parsed entries
+    """
+    if not _executor or len(entries) < MIN_PARALLEL_ENTRIES:
+        return _run_chain(chain, entries)
+
+    chunk_count = _jobs * CHUNKS_PER_WORKER
+    chunk_size = -(-len(entries) // chunk_count)
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    payloads = [[tuple(getattr(entry, field) for field in PARSED_FIELDS) for entry in chunk]
+                for chunk in chunks]
+
+    print(f"      Parsing {len(entries)} entries in {len(chunks)} chunks...")
+    results = _executor.map(_parse_chunk, [chain] * len(chunks), payloads)
+
+    # Workers parse copies of the fields, so write the results back onto the entries
+    for chunk, parsed_chunk in zip(chunks, results):
+        for entry, values in zip(chunk, parsed_chunk):
+            for field, value in zip(PARSED_FIELDS, values):
+                setattr(entry, field, value)
+
+    return entries
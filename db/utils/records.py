@@ -0,0 +1,86 @@
+"""
+This module provides the compact records passed from scrapers through parsers to the database.
+Entries and links are slotted objects instead of dicts, and the fields every link of a listing
+has in common (type, format, host and source URL) are stored once in a shared `LinkSource`.
+"""
+
+# Shared link sources, keyed by their fields
+_link_sources = {}
+
+
+def get_link_source(type, format, host, source_url):
+    """Get the shared link source for a combination of fields, creating it on first use."""
+    key = (type, format, host, source_url)
+    link_source = _link_sources.get(key)
+    if link_source is None:
+        link_source = _link_sources[key] = LinkSource(*key)
+    return link_source
+
+
+class LinkSource:
+    """Fields shared by all links of a listing."""
+
+    __slots__ = ('type', 'format', 'host', 'source_url')
+
+    def __init__(self, type, format, host, source_url):
+        self.type = type
+        self.format = format
+        self.host = host
+        self.source_url = source_url
+
+    def __reduce__(self):
+        # Share link sources again when records are loaded from snapshots or worker processes
+        return get_link_source, (self.type, self.format, self.host, self.source_url)
+
+
+class Link:
+    """A single download link of an entry."""
+
+    __slots__ = ('name', 'url', 'filename', 'size', 'source')
+
+    def __init__(self, name, url, filename, size, source):
+        self.name = name
+        self.url = url
+        self.filename = filename
+        self.size = size
+        self.source = source
+
+    @property
+    def type(self):
+        return self.source.type
+
+    @property
+    def format(self):
+        return self.source.format
+
+    @property
+    def host(self):
+        return self.source.host
+
+    @property
+    def source_url(self):
+        return self.source.source_url
+
+
+class Entry:
+    """A game entry with its links, as scraped and then enriched by parsers."""
+
+    __slots__ = ('title', 'platform', 'regions', 'links', 'row', 'rom_id', 'roms', 'boxart_url',
+                 'alt_titles', 'slug', 'search_key')
+
+    def __init__(self, title, platform, regions, links, row=None, rom_id=None):
+        self.title = title
+        self.platform = platform
+        self.regions = regions
+        self.links = links
+        # Listing row used for delta detection: (source URL, key, fingerprint)
+        self.row = row
+        self.rom_id = rom_id
+        # ROM checksums: (name, size, crc32, md5, sha1) tuples
+        self.roms = ()
+        self.boxart_url = None
+        # Other names of the game found by parsers, indexed for search along with the title
+        self.alt_titles = ()
+        # Set when the entry is inserted into the database
+        self.slug = None
+        self.search_key = None
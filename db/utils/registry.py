@@ -0,0 +1,50 @@
+"""
+This module provides a lazy registry of scraper and parser plugins.
+Plugins are discovered by module name in their package directory without importing them,
+and each one is only imported the first time a source actually uses it.
+"""
+import importlib
+import os
+import pkgutil
+
+# Root directory of the database scripts (parent of the plugin packages)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point every plugin module of a package must provide
+PLUGIN_ENTRY_POINTS = {
+    'scrapers': 'scrape',
+    'parsers': 'parse'
+}
+
+# Modules of each package that support the plugins rather than being plugins themselves
+SUPPORT_MODULES = {
+    'scrapers': {'base'},
+    'parsers': set()
+}
+
+# Cache of imported plugin modules (or None if not a valid plugin)
+_plugins = {}
+
+
+def discover(package):
+    """List the names of the plugins available in a package without importing them."""
+    path = os.path.join(ROOT_DIR, package)
+    return sorted(module.name for module in pkgutil.iter_modules([path])
+                  if not module.name.startswith('_') and module.name not in SUPPORT_MODULES[package])
+
+
+def get_plugin(package, name):
+    """Retrieve a plugin module by name, importing it on first use.
+
+    Returns:
+        The plugin module, or None if no plugin with that name exists
+    """
+    key = (package, name)
+    if key not in _plugins:
+        plugin = None
+        if name in discover(package):
+            module = importlib.import_module(f'{package}.{name}')
+            if hasattr(module, PLUGIN_ENTRY_POINTS[package]):
+                plugin = module
+        _plugins[key] = plugin
+    return _plugins[key]
@@ -1,9 +1,11 @@
 """
 This module provides utilities for scraping web content and caching responses.
 """
+import asyncio
+import functools
+import threading
 import time
-import cloudscraper
-from playwright.sync_api import sync_playwright
+from concurrent.futures import ThreadPoolExecutor
 
 from utils import cache_manager
 
@@ -26,21 +28,38 @@ MAX_RETRIES = 5
 RETRY_DELAY = 3  # seconds between retries
 REQUEST_DELAY = 1  # seconds between requests to avoid rate limiting
 
+# Batch fetch settings (many small files from the same host)
+BATCH_MAX_WORKERS = 16
+BATCH_REQUEST_DELAY = 0.05  # seconds between request starts within a batch
+
 # Global Playwright browser instance for efficiency
 _playwright = None
 _browser = None
+_browser_executor = None
 _last_request_time = 0
+_rate_limit_lock = threading.Lock()
 
 
 def _get_browser():
     """Get or create the Playwright browser instance."""
     global _playwright, _browser
     if _browser is None:
+        # Imported lazily, only runs that scrape browser-only hosts need Playwright
+        from playwright.sync_api import sync_playwright
+
         _playwright = sync_playwright().start()
         _browser = _playwright.chromium.launch(headless=True)
     return _browser
 
 
+def _get_browser_executor():
+    """Get the single thread that owns the Playwright browser (its sync API is bound to one thread)."""
+    global _browser_executor
+    if _browser_executor is None:
+        _browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='playwright')
+    return _browser_executor
+
+
 def close_browser():
     """Close the Playwright browser when done."""
     global _playwright, _browser
@@ -57,13 +76,16 @@ def _needs_playwright(url):
     return any(host in url for host in PLAYWRIGHT_REQUIRED_HOSTS)
 
 
-def _rate_limit():
-    """Enforce rate limiting between requests."""
+def _rate_limit(delay=REQUEST_DELAY):
+    """Enforce rate limiting between requests (safe to call from multiple threads)."""
     global _last_request_time
-    elapsed = time.time() - _last_request_time
-    if elapsed < REQUEST_DELAY:
-        time.sleep(REQUEST_DELAY - elapsed)
-    _last_request_time = time.time()
+    with _rate_limit_lock:
+        # Reserve the next request slot, then sleep outside the lock
+        now = time.time()
+        start_time = max(now, _last_request_time + delay)
+        _last_request_time = start_time
+    if start_time > now:
+        time.sleep(start_time - now)
 
 
 def _fetch_with_playwright(url):
@@ -101,6 +123,8 @@ def _fetch_with_playwright(url):
 
 def create_scraper_session(headers=None):
     """Create a scraper session and optionally apply custom headers."""
+    import cloudscraper
+
     session = cloudscraper.create_scraper(
         browser={
             'browser': 'chrome',
@@ -114,8 +138,73 @@ def create_scraper_session(headers=None):
     return session
 
 
-def fetch_url(url, session=None):
-    """Fetch the content of a URL and cache the response."""
+def fetch_urls(urls, use_cached=False, session=None, max_workers=BATCH_MAX_WORKERS):
+    """Fetch many URLs concurrently and cache each response.
+
+    Cached responses are used when `use_cached` is set; the remaining URLs are
+    fetched in parallel through a shared session, throttled by the rate limiter.
+
+    Returns:
+        Dict mapping each URL to its response string, or None if the fetch failed
+    """
+    results = {}
+    pending = []
+    for url in dict.fromkeys(urls):
+        response = cache_manager.get_cached_response(url) if use_cached else None
+        if response is not None:
+            results[url] = response
+        else:
+            pending.append(url)
+
+    if not pending:
+        return results
+
+    if not session:
+        session = create_scraper_session(BROWSER_HEADERS)
+
+    def fetch(url):
+        _rate_limit(BATCH_REQUEST_DELAY)
+        try:
+            r = session.get(url, timeout=60)
+        except Exception as e:
+            print(f"      {url}... error: {e}")
+            return None
+        if not r.ok:
+            print(f"      {url}... HTTP {r.status_code}")
+            return None
+        cache_manager.cache_response(url, r.text)
+        return r.text
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        for url, response in zip(pending, executor.map(fetch, pending)):
+            results[url] = response
+
+    return results
+
+
+def _get_conditional_headers(url):
+    """Build conditional request headers from the cached validators of a URL."""
+    if cache_manager.get_cache_age_days(url) is None:
+        return {}
+
+    validators = cache_manager.get_cached_validators(url)
+    headers = {}
+    if 'ETag' in validators:
+        headers['If-None-Match'] = validators['ETag']
+    if 'Last-Modified' in validators:
+        headers['If-Modified-Since'] = validators['Last-Modified']
+    return headers
+
+
+def fetch_url(url, session=None, conditional=False):
+    """Fetch the content of a URL and cache the response.
+
+    Args:
+        url: The URL to fetch
+        session: Optional session to fetch with (a browser-like one is created if not given)
+        conditional: Revalidate an existing cached response with the server instead of
+            downloading it again, if the host supports conditional requests
+    """
     # Get short URL for display (handle trailing slashes)
     url_stripped = url.rstrip('/')
     short_url = url_stripped.split('/')[-1][:50] if '/' in url_stripped else url_stripped[:50]
@@ -131,8 +220,15 @@ def fetch_url(url, session=None):
     if not session:
         session = create_scraper_session(BROWSER_HEADERS)
 
+    headers = _get_conditional_headers(url) if conditional else {}
+
     try:
-        r = session.get(url, timeout=60)
+        r = session.get(url, headers=headers, timeout=60)
+
+        if r.status_code == 304:
+            cache_manager.touch_cached_response(url)
+            print(f"      {short_url}... not modified")
+            return cache_manager.get_cached_response(url, max_age_days=0)
 
         if not r.ok:
             print(f"      {short_url}... HTTP {r.status_code}")
@@ -140,9 +236,22 @@ def fetch_url(url, session=None):
 
         response = r.text
         cache_manager.cache_response(url, response)
+        if conditional:
+            cache_manager.cache_validators(url, r.headers)
         print(f"      {short_url}... OK")
 
         return response
     except Exception as e:
         print(f"      {short_url}... error: {e}")
         return None
+
+
+async def fetch_url_async(url, session=None, conditional=False):
+    """Fetch the content of a URL without blocking the event loop (see `fetch_url`).
+
+    Browser fetches all run on the single Playwright thread, other fetches run concurrently.
+    """
+    executor = _get_browser_executor() if _needs_playwright(url) else None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(fetch_url, url, session, conditional))
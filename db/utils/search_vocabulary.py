@@ -0,0 +1,45 @@
+"""
+This module derives the typo-tolerant search vocabulary from entry titles.
+Titles are split into words normalized like search keys, and every word is indexed by its
+SymSpell deletion variants: the strings left after deleting up to `MAX_EDIT_DISTANCE` characters
+from its first `PREFIX_LENGTH` characters. A misspelled word shares a variant with the words it
+is close to, so the app finds correction candidates with indexed lookups instead of a scan.
+The app generates the variants of query words the same way, so these constants are mirrored there.
+"""
+from collections import Counter
+from itertools import combinations
+
+from utils.parse_utils import get_title_keys
+
+# Number of deleted characters a variant can differ from its word by
+MAX_EDIT_DISTANCE = 1
+
+# Only the start of words is used for variants, which bounds their number for long words
+PREFIX_LENGTH = 7
+
+# Shorter words have too many close neighbours for corrections to be useful
+MIN_TERM_LENGTH = 4
+
+
+def get_terms(title):
+    """Get the words of a title, normalized like search keys."""
+    terms = (get_title_keys(word)[1] for word in title.split())
+    return [term for term in terms if term]
+
+
+def get_term_frequencies(titles):
+    """Count the number of titles each term appears in."""
+    frequencies = Counter()
+    for title in titles:
+        frequencies.update(set(get_terms(title)))
+    return frequencies
+
+
+def get_variants(term):
+    """Get the deletion variants of a term prefix, including the prefix itself."""
+    prefix = term[:PREFIX_LENGTH]
+    variants = {prefix}
+    for distance in range(1, min(MAX_EDIT_DISTANCE, len(prefix) - 1) + 1):
+        for positions in combinations(range(len(prefix)), distance):
+            variants.add(''.join(c for i, c in enumerate(prefix) if i not in positions))
+    return variants
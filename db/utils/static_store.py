@@ -0,0 +1,110 @@
+"""
+This module provides write-if-changed storage for the small static files generated during a build
+(PS3 RAP files and PS Vita zRIF strings). A manifest of content hashes is kept next to each directory,
+so unchanged files are never rewritten. Files can optionally also be packed into a single indexed
+SQLite file per directory that clients can serve from.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+# Suffixes of the manifest and packed files created next to each static directory
+MANIFEST_SUFFIX = '.manifest.json'
+PACK_SUFFIX = '.db'
+
+# Whether to also write files into the packed output (enabled with `make.py --pack-static`)
+PACK_ENABLED = False
+
+# In-memory manifests of content hashes, keyed by directory
+_manifests = {}
+
+# Directories whose manifest changed since the last flush
+_dirty = set()
+
+# Files waiting to be packed, keyed by directory then file name. Packed outputs are only opened
+# in `flush`, so SQLite connections never cross the threads scrapers write files from.
+_pack_rows = {}
+
+
+def _hash(data):
+    """Return the hex digest used to compare file contents."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def _load_manifest(directory):
+    """Load the manifest for a directory, dropping records of files that no longer exist."""
+    manifest = {}
+    try:
+        with open(f'{directory}{MANIFEST_SUFFIX}', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    existing = set(os.listdir(directory))
+    return {name: digest for name, digest in manifest.items() if name in existing}
+
+
+def _write_pack(directory, rows):
+    """Write the files whose content changed into the packed output of a directory."""
+    con = sqlite3.connect(f'{directory}{PACK_SUFFIX}')
+    try:
+        con.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                sha1 TEXT,
+                data BLOB
+            ) WITHOUT ROWID
+        ''')
+        hashes = dict(con.execute('SELECT name, sha1 FROM files'))
+        con.executemany(
+            'INSERT OR REPLACE INTO files (name, sha1, data) VALUES (?, ?, ?)',
+            [(filename, digest, data) for filename, (digest, data) in rows.items()
+             if hashes.get(filename) != digest])
+        con.commit()
+    finally:
+        con.close()
+
+
+def write_file(directory, filename, data):
+    """Write a file only if its content differs from the last written version.
+
+    Args:
+        directory: The static directory the file belongs to
+        filename: The name of the file inside the directory
+        data: The file content as bytes
+
+    Returns:
+        True if the file was written, False if it was unchanged
+    """
+    if directory not in _manifests:
+        _manifests[directory] = _load_manifest(directory)
+    manifest = _manifests[directory]
+
+    digest = _hash(data)
+
+    if PACK_ENABLED:
+        _pack_rows.setdefault(directory, {})[filename] = (digest, data)
+
+    if manifest.get(filename) == digest:
+        return False
+
+    with open(os.path.join(directory, filename), 'wb') as f:
+        f.write(data)
+    manifest[filename] = digest
+    _dirty.add(directory)
+
+    return True
+
+
+def flush():
+    """Persist changed manifests and write the queued files into the packed outputs."""
+    for directory in _dirty:
+        with open(f'{directory}{MANIFEST_SUFFIX}', 'w', encoding='utf-8') as f:
+            json.dump(_manifests[directory], f, sort_keys=True, separators=(',', ':'))
+    _dirty.clear()
+
+    for directory, rows in _pack_rows.items():
+        _write_pack(directory, rows)
+    _pack_rows.clear()
@@ -24,4 +24,4 @@ if __name__ == '__main__':
     download_gametdb_xmls()
     download_libretro_dats()
     download_mame_hashes()
-    make(use_cached=use_cached)
+    make(use_cached=use_cached, jobs=os.cpu_count() or 1)
@@ -61,12 +61,17 @@ class SearchResult {
   final int totalPages;
   final int currentResults;
 
+  /// The typo-corrected query the results were found with, if the original
+  /// query matched nothing
+  final String? correctedQuery;
+
   const SearchResult({
     required this.entries,
     required this.totalResults,
     required this.currentPage,
     required this.totalPages,
     required this.currentResults,
+    this.correctedQuery,
   });
 
   bool get hasMore => currentPage < totalPages;
@@ -79,8 +79,10 @@ class SearchNotifier extends StateNotifier<SearchState> {
 
     try {
       final nextPage = currentResult.currentPage + 1;
+      // Keep paging through the corrected query the first page was found with
+      final query = currentResult.correctedQuery ?? state.query;
       final result = await _db.search(
-        query: state.query.isEmpty ? null : state.query,
+        query: query.isEmpty ? null : query,
         platforms: state.selectedPlatforms.isEmpty
             ? null
             : state.selectedPlatforms,
@@ -96,6 +98,7 @@ class SearchNotifier extends StateNotifier<SearchState> {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         currentResults: combinedEntries.length,
+        correctedQuery: currentResult.correctedQuery,
       );
 
       state = state.copyWith(result: combinedResult, isLoading: false);
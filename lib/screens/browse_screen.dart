@@ -346,9 +346,13 @@ class _BrowseScreenState extends ConsumerState<BrowseScreen> {
                     vertical: 8,
                   ),
                   child: Text(
-                    searchState.result!.hasMore
-                        ? '${searchState.result!.currentResults}+ results'
-                        : '${searchState.result!.totalResults} results',
+                    [
+                      if (searchState.result!.correctedQuery != null)
+                        'Showing results for "${searchState.result!.correctedQuery}"',
+                      searchState.result!.hasMore
+                          ? '${searchState.result!.currentResults}+ results'
+                          : '${searchState.result!.totalResults} results',
+                    ].join(' • '),
                     style: Theme.of(context).textTheme.bodySmall,
                   ),
                 ),
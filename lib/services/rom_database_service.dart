@@ -1,4 +1,5 @@
 import 'dart:convert';
+import 'dart:developer' as developer;
 import 'dart:io';
 
 import 'package:archive/archive.dart';
@@ -6,8 +7,11 @@ import 'package:dio/dio.dart';
 import 'package:path/path.dart' as p;
 import 'package:path_provider/path_provider.dart';
 import 'package:sqflite/sqflite.dart';
+import 'package:sqflite_common_ffi/sqflite_ffi.dart' show databaseFactoryFfi;
+import 'package:sqlite3_flutter_libs/sqlite3_flutter_libs.dart';
 
 import '../models/models.dart';
+import 'storage_service.dart';
 
 class DatabaseVersion {
   final String version;
@@ -50,7 +54,22 @@ class RomDatabaseService {
   static const String _dbFileName = 'romdb.db';
   static const String _versionFileName = 'version.json';
 
+  // Table layout version this service reads, matching SCHEMA_VERSION in
+  // db/database/db_manager.py
+  static const int _schemaVersion = 3;
+
+  // Each schema version is published under its own file names, so older
+  // app releases keep downloading databases they can read
+  static const String _remoteDbFileName = 'romdb.v$_schemaVersion.db';
+  static const String _remoteVersionFileName = 'version.v$_schemaVersion.json';
+
+  // Typo correction settings, matching db/utils/search_vocabulary.py
+  static const int _maxEditDistance = 1;
+  static const int _termPrefixLength = 7;
+  static const int _minTermLength = 4;
+
   Database? _database;
+  bool? _hasTrigramIndex;
   final Dio _dio;
 
   RomDatabaseService({Dio? dio})
@@ -84,11 +103,10 @@ class RomDatabaseService {
     // Verify the database is actually usable
     try {
       final db = await database;
-      await db.rawQuery('''
-        SELECT COUNT(*) FROM entries e
-        JOIN entries_fts fts ON fts.docid = e.rowid
-        LIMIT 1
-      ''');
+      if (await db.getVersion() != _schemaVersion) {
+        throw StateError('Unsupported database schema');
+      }
+      await db.rawQuery('SELECT COUNT(*) FROM entries_full LIMIT 1');
       return true;
     } catch (_) {
       // Database exists but is corrupted or incompatible - delete it
@@ -134,7 +152,7 @@ class RomDatabaseService {
 
   Future<DatabaseVersion?> checkForUpdate() async {
     try {
-      final response = await _dio.get('$_baseUrl/$_versionFileName');
+      final response = await _dio.get('$_baseUrl/$_remoteVersionFileName');
       final remoteVersion = DatabaseVersion.fromJson(response.data);
       final localVersion = await getLocalVersion();
 
@@ -159,7 +177,7 @@ class RomDatabaseService {
 
     try {
       await _dio.download(
-        '$_baseUrl/$_dbFileName.gz',
+        '$_baseUrl/$_remoteDbFileName.gz',
         tempGzPath,
         onReceiveProgress: (received, total) {
           if (total > 0) {
@@ -177,7 +195,7 @@ class RomDatabaseService {
       await dbFile.writeAsBytes(decompressed);
 
       final versionResponse =
-          await _dio.get('$_baseUrl/$_versionFileName');
+          await _dio.get('$_baseUrl/$_remoteVersionFileName');
       final versionData = versionResponse.data;
       final versionString = versionData is String ? versionData : json.encode(versionData);
       await File(versionPath).writeAsString(versionString);
@@ -201,7 +219,13 @@ class RomDatabaseService {
     }
 
     final dbPath = await _dbPath;
-    _database = await openDatabase(dbPath, readOnly: true);
+    // The catalog is opened with the bundled SQLite rather than the system
+    // one, which is older than 3.34 or lacks FTS5 on many Android versions
+    await applyWorkaroundToOpenSqlite3OnOldAndroidVersions();
+    _database = await databaseFactoryFfi.openDatabase(
+      dbPath,
+      options: OpenDatabaseOptions(readOnly: true),
+    );
     return _database!;
   }
 
@@ -210,6 +234,32 @@ class RomDatabaseService {
       await _database!.close();
       _database = null;
     }
+    _hasTrigramIndex = null;
+  }
+
+  /// Check if the trigram title index can be queried, which needs SQLite 3.34+
+  /// (bundled with the app) and a database built with it
+  Future<bool> _canUseTrigramIndex(Database db) async {
+    if (_hasTrigramIndex != null) {
+      return _hasTrigramIndex!;
+    }
+
+    try {
+      await db.rawQuery('''
+        SELECT rowid FROM entries_search
+        WHERE entries_search MATCH '"abc"'
+        LIMIT 1
+      ''');
+      _hasTrigramIndex = true;
+    } catch (e) {
+      developer.log(
+        'Trigram search index unavailable, falling back to LIKE scans',
+        name: 'RomDatabaseService',
+        error: e,
+      );
+      _hasTrigramIndex = false;
+    }
+    return _hasTrigramIndex!;
   }
 
   Future<List<Platform>> getPlatforms() async {
@@ -250,21 +300,44 @@ class RomDatabaseService {
     var whereClause = '';
 
     if (query != null && query.isNotEmpty) {
-      var searchSql = '''
-        SELECT DISTINCT e.slug, e.rom_id, e.title, e.platform, e.boxart_url,
-               GROUP_CONCAT(DISTINCT r.name) as region_names
-        FROM entries e
-        LEFT JOIN regions_entries re ON re.entry = e.slug
-        LEFT JOIN regions r ON r.id = re.region
-      ''';
-
       final words = query.toLowerCase().split(RegExp(r'\s+'));
+      final useTrigramIndex = await _canUseTrigramIndex(db);
+      final matchPhrases = <String>[];
       final likeConditions = <String>[];
       for (final word in words) {
         final cleaned = word.replaceAll(RegExp(r'[^\w\d]'), '');
         if (cleaned.isEmpty) continue;
-        likeConditions.add("LOWER(e.title) LIKE '%$cleaned%'");
+        // Trigrams only match words of 3 characters or more. Phrases keep
+        // their punctuation, so serials like "slus-20062" match as stored
+        if (useTrigramIndex && word.length >= 3) {
+          matchPhrases.add('"${word.replaceAll('"', '""')}"');
+        } else {
+          likeConditions.add("LOWER(e.title) LIKE '%$cleaned%'");
+        }
+      }
+
+      // Matches in titles rank above matches in ROM IDs and alternate titles
+      final useRanking = matchPhrases.isNotEmpty;
+      var searchSql = '''
+        SELECT DISTINCT e.slug, e.rom_id, e.title, e.platform, e.boxart_url,
+               GROUP_CONCAT(DISTINCT r.name) as region_names
+        FROM entries_full e
+      ''';
+      if (useRanking) {
+        searchSql += '''
+          JOIN (
+            SELECT rowid, rank
+            FROM entries_search
+            WHERE entries_search MATCH ?
+              AND rank MATCH 'bm25(10.0, 2.0, 5.0)'
+          ) s ON s.rowid = e.id
+        ''';
+        params.add(matchPhrases.join(' '));
       }
+      searchSql += '''
+        LEFT JOIN regions_entries re ON re.entry = e.id
+        LEFT JOIN regions r ON r.id = re.region
+      ''';
 
       final allConditions = [...likeConditions];
 
@@ -287,7 +360,7 @@ class RomDatabaseService {
       searchSql += '''
         $whereClause
         GROUP BY e.slug
-        ORDER BY e.title
+        ORDER BY ${useRanking ? 's.rank, ' : ''}e.title
         LIMIT ? OFFSET ?
       ''';
       params.addAll([maxResults + 1, offset]);
@@ -297,6 +370,28 @@ class RomDatabaseService {
       final limitedResults = hasMore ? results.sublist(0, maxResults) : results;
       final entries = await _mapResultsToEntries(db, limitedResults);
 
+      // Search again with typos corrected when nothing matched
+      if (entries.isEmpty && page == 1) {
+        final suggestion = await suggestQuery(query);
+        if (suggestion != null) {
+          final corrected = await search(
+            query: suggestion,
+            platforms: platforms,
+            regions: regions,
+            page: page,
+            maxResults: maxResults,
+          );
+          return SearchResult(
+            entries: corrected.entries,
+            totalResults: corrected.totalResults,
+            currentPage: corrected.currentPage,
+            totalPages: corrected.totalPages,
+            currentResults: corrected.currentResults,
+            correctedQuery: suggestion,
+          );
+        }
+      }
+
       final estimatedTotal = hasMore ? offset + maxResults + 1 : offset + entries.length;
       final estimatedPages = (estimatedTotal / maxResults).ceil();
 
@@ -311,8 +406,8 @@ class RomDatabaseService {
       var searchSql = '''
         SELECT DISTINCT e.slug, e.rom_id, e.title, e.platform, e.boxart_url,
                GROUP_CONCAT(DISTINCT r.name) as region_names
-        FROM entries e
-        LEFT JOIN regions_entries re ON re.entry = e.slug
+        FROM entries_full e
+        LEFT JOIN regions_entries re ON re.entry = e.id
         LEFT JOIN regions r ON r.id = re.region
       ''';
 
@@ -360,11 +455,131 @@ class RomDatabaseService {
     }
   }
 
+  /// Suggest a corrected query, replacing each unknown word with the most
+  /// frequent known term it is one typo away from. Returns null if no word
+  /// could be corrected or the database has no search vocabulary
+  Future<String?> suggestQuery(String query) async {
+    final db = await database;
+    final words = query.toLowerCase().split(RegExp(r'\s+'));
+    final corrected = <String>[];
+    var changed = false;
+
+    try {
+      for (final word in words) {
+        final term = word.replaceAll(RegExp(r'[^a-z0-9]'), '');
+        if (term.length < _minTermLength) {
+          if (term.isNotEmpty) corrected.add(term);
+          continue;
+        }
+
+        final known = await db.rawQuery(
+          'SELECT 1 FROM search_terms WHERE term = ?',
+          [term],
+        );
+        if (known.isNotEmpty) {
+          corrected.add(term);
+          continue;
+        }
+
+        final variants = _getTermVariants(term).toList();
+        final placeholders = variants.map((_) => '?').join(',');
+        final candidates = await db.rawQuery('''
+          SELECT DISTINCT t.term, t.frequency
+          FROM search_term_variants v
+          JOIN search_terms t ON t.id = v.term
+          WHERE v.variant IN ($placeholders)
+        ''', variants);
+
+        // Variants only cover the start of words, so check the whole words
+        String? best;
+        var bestDistance = _maxEditDistance + 1;
+        var bestFrequency = 0;
+        for (final row in candidates) {
+          final candidate = row['term'] as String;
+          final frequency = row['frequency'] as int;
+          final distance = _getEditDistance(term, candidate);
+          if (distance < bestDistance ||
+              (distance == bestDistance && frequency > bestFrequency)) {
+            best = candidate;
+            bestDistance = distance;
+            bestFrequency = frequency;
+          }
+        }
+
+        if (best != null && bestDistance <= _maxEditDistance) {
+          corrected.add(best);
+          changed = true;
+        } else {
+          corrected.add(term);
+        }
+      }
+    } catch (_) {
+      // Databases built before the vocabulary was added
+      return null;
+    }
+
+    return changed ? corrected.join(' ') : null;
+  }
+
+  /// Get the deletion variants of the start of a term, including itself
+  Set<String> _getTermVariants(String term) {
+    final prefix = term.length > _termPrefixLength
+        ? term.substring(0, _termPrefixLength)
+        : term;
+    var variants = {prefix};
+    var previous = {prefix};
+    for (var distance = 1; distance <= _maxEditDistance; distance++) {
+      final next = <String>{};
+      for (final variant in previous) {
+        if (variant.length <= 1) continue;
+        for (var i = 0; i < variant.length; i++) {
+          next.add(variant.substring(0, i) + variant.substring(i + 1));
+        }
+      }
+      variants = {...variants, ...next};
+      previous = next;
+    }
+    return variants;
+  }
+
+  /// Get the edit distance between two words, counting a swap of adjacent
+  /// characters as one edit
+  int _getEditDistance(String a, String b) {
+    final rows = List.generate(
+      a.length + 1,
+      (i) => List<int>.filled(b.length + 1, 0),
+    );
+    for (var i = 0; i <= a.length; i++) {
+      rows[i][0] = i;
+    }
+    for (var j = 0; j <= b.length; j++) {
+      rows[0][j] = j;
+    }
+    for (var i = 1; i <= a.length; i++) {
+      for (var j = 1; j <= b.length; j++) {
+        final cost = a[i - 1] == b[j - 1] ? 0 : 1;
+        var value = [
+          rows[i - 1][j] + 1,
+          rows[i][j - 1] + 1,
+          rows[i - 1][j - 1] + cost,
+        ].reduce((x, y) => x < y ? x : y);
+        if (i > 1 &&
+            j > 1 &&
+            a[i - 1] == b[j - 2] &&
+            a[i - 2] == b[j - 1]) {
+          value = value < rows[i - 2][j - 2] + 1 ? value : rows[i - 2][j - 2] + 1;
+        }
+        rows[i][j] = value;
+      }
+    }
+    return rows[a.length][b.length];
+  }
+
   Future<RomEntry?> getEntry(String slug) async {
     final db = await database;
 
     final entryResults = await db.query(
-      'entries',
+      'entries_full',
       where: 'slug = ?',
       whereArgs: [slug],
     );
@@ -372,22 +587,27 @@ class RomDatabaseService {
     if (entryResults.isEmpty) return null;
 
     final entry = entryResults.first;
+    final entryId = entry['id'] as int;
 
     final regionResults = await db.rawQuery('''
       SELECT r.name FROM regions r
       JOIN regions_entries re ON re.region = r.id
       WHERE re.entry = ?
-    ''', [slug]);
+    ''', [entryId]);
 
     final regions = regionResults.map((r) => r['name'] as String).toList();
 
-    final linkResults = await db.query(
-      'links',
-      where: 'entry = ?',
-      whereArgs: [slug],
-    );
+    final linkResults = await db.rawQuery('''
+      SELECT l.name, l.url, l.filename, l.size,
+             s.type, s.format, s.host, s.source_url
+      FROM links_full l
+      JOIN link_sources s ON s.id = l.source
+      WHERE l.entry = ?
+      ORDER BY l.id
+    ''', [entryId]);
 
     final links = linkResults.map((l) {
+      final size = l['size'] as int? ?? 0;
       return DownloadLink(
         name: l['name'] as String? ?? '',
         type: l['type'] as String? ?? 'Game',
@@ -395,8 +615,8 @@ class RomDatabaseService {
         url: l['url'] as String? ?? '',
         filename: l['filename'] as String? ?? '',
         host: l['host'] as String? ?? '',
-        size: l['size'] as int? ?? 0,
-        sizeStr: l['size_str'] as String? ?? '',
+        size: size,
+        sizeStr: StorageService.formatBytes(size),
         sourceUrl: l['source_url'] as String? ?? '',
       );
     }).toList();